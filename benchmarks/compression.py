@@ -0,0 +1,68 @@
+"""
+Đo số byte tiết kiệm được và thời gian CPU khi nén response của các endpoint JSON lớn.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/compression.py
+    python benchmarks/compression.py --path /api/events/ --path /api/users/ --repeat 50
+
+Gọi endpoint bằng test client (không qua mạng) để lấy body gốc, rồi nén lại bằng đúng hàm
+của mysite/compression.py với từng encoding. Mặc định đo sections-with-lessons của khóa học
+đầu tiên, danh sách sự kiện, danh sách user và khóa học trả phí.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def default_paths():
+    from courses.models import Course
+
+    course = Course.objects.order_by("pk").first()
+    paths = ["/api/events/", "/api/users/", "/api/enrollments/paid/"]
+    if course is not None:
+        paths.insert(0, f"/api/courses/{course.pk}/sections-with-lessons/")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="mysite.settings")
+    parser.add_argument("--path", action="append", help="Endpoint cần đo, lặp lại được")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần nén mỗi body để lấy thời gian trung bình")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", args.settings)
+    import django
+    django.setup()
+
+    from django.test import Client
+
+    from mysite import compression
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    client = Client()
+
+    print(f"{'endpoint':<48}{'raw':>10}" + "".join(f"{name + ' bytes':>12}{'%':>7}{'ms':>8}" for name in encodings))
+    for path in args.path or default_paths():
+        response = client.get(path)
+        if response.status_code != 200 or response.streaming:
+            print(f"{path:<48}  bỏ qua (HTTP {response.status_code})")
+            continue
+        content = response.content
+        row = f"{path:<48}{len(content):>10}"
+        for encoding in encodings:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                compressed = compression.compress(content, encoding)
+            ms = (time.perf_counter() - start) / args.repeat * 1000
+            saved = 100 * (1 - len(compressed) / len(content)) if content else 0
+            row += f"{len(compressed):>12}{saved:>6.1f}%{ms:>8.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
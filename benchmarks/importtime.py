@@ -0,0 +1,75 @@
+"""
+Đo thời gian import lúc khởi động worker bằng `python -X importtime`.
+
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --top 30 --max-ms 1500
+
+Chạy django.setup() và resolve URLconf giống request đầu tiên của một worker,
+in ra các package import chậm nhất. Với --max-ms, script trả về exit code 1 khi
+tổng thời gian vượt ngưỡng, dùng được làm bước kiểm tra trong CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+STARTUP_CODE = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def run_importtime(settings_module):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(result.returncode)
+    return result.stderr.splitlines()
+
+
+def parse(lines):
+    # Dòng có dạng: "import time:  self [us] | cumulative | imported package"
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="mysite.settings")
+    parser.add_argument("--top", type=int, default=20, help="Số package chậm nhất cần in")
+    parser.add_argument("--max-ms", type=float, help="Ngưỡng tổng thời gian import (ms)")
+    args = parser.parse_args()
+
+    modules = parse(run_importtime(args.settings))
+
+    # Gộp theo package gốc (django, rest_framework, cloudinary...) dựa trên thời gian self
+    by_package = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.strip().split(".")[0]] += self_us
+    total_ms = sum(by_package.values()) / 1000
+
+    print(f"{len(modules)} modules, tổng {total_ms:.1f} ms\n")
+    print(f"{'package':<32}{'ms':>10}{'%':>8}")
+    for package, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<32}{us / 1000:>10.1f}{us / 10 / total_ms:>7.1f}%")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"\nVượt ngưỡng: {total_ms:.1f} ms > {args.max_ms:.1f} ms")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+So sánh hai cách lưu tiến độ học: bảng LessonProgress và Enrollment.progress (packed).
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/lesson_progress.py
+    python benchmarks/lesson_progress.py --users 500 --lessons 200
+
+Tạo dữ liệu giả (users × lessons đã học) trong một transaction rồi rollback, đo dung lượng
+lưu trữ, thời gian ghi từng bài và thời gian đọc tiến độ một khóa học của một user.
+Dung lượng bảng chỉ đo được trên PostgreSQL và SQLite có dbstat; nơi khác in dung lượng dữ liệu thô.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+class Rollback(Exception):
+    pass
+
+
+def table_bytes(connection, table):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == "sqlite":
+            try:
+                # Tổng các page của bảng và index của bảng
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = %s "
+                    "OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table, table],
+                )
+                return cursor.fetchone()[0] or 0
+            except Exception:
+                return None
+    return None
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(args):
+    from django.contrib.auth.models import User
+    from django.db import connection, transaction
+    from django.db.models import Sum
+    from django.db.models.functions import Length
+    from django.utils import timezone
+
+    from courses.models import Course, Enrollment, Lesson, LessonProgress, Section
+    from courses.progress import pack_rows, set_progress, unpack
+
+    rng = random.Random(42)
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            progress_before = table_bytes(connection, LessonProgress._meta.db_table)
+            enrollment_before = table_bytes(connection, Enrollment._meta.db_table)
+
+            course = Course.objects.create(title="bench-progress", description="", is_paid=False, price=0)
+            section = Section.objects.create(course=course, title="bench", order=1)
+            lessons = Lesson.objects.bulk_create(
+                Lesson(section=section, title=f"bench-{i}", order=i) for i in range(args.lessons)
+            )
+            users = User.objects.bulk_create(User(username=f"bench-progress-{i}") for i in range(args.users))
+            Enrollment.objects.bulk_create(Enrollment(user=user, course=course) for user in users)
+
+            # Bảng LessonProgress: một dòng cho mỗi (user, bài đã học)
+            watched = int(args.lessons * args.watched)
+            rows = [
+                LessonProgress(user=user, lesson=lesson, watched=True, completed_at=now)
+                for user in users for lesson in rng.sample(lessons, watched)
+            ]
+            start = time.perf_counter()
+            LessonProgress.objects.bulk_create(rows, batch_size=1000)
+            rows_load_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            pack_rows()
+            pack_s = time.perf_counter() - start
+
+            print(f"{args.users} users × {args.lessons} bài, mỗi user đã học {watched} bài ({len(rows)} dòng)\n")
+            print("Dung lượng")
+            progress_after = table_bytes(connection, LessonProgress._meta.db_table)
+            enrollment_after = table_bytes(connection, Enrollment._meta.db_table)
+            packed_bytes = Enrollment.objects.filter(course=course).aggregate(total=Sum(Length("progress")))["total"]
+            if progress_after is not None and progress_before is not None:
+                print(f"  LessonProgress (bảng + index): {(progress_after - progress_before) / 1024:>10.1f} KiB")
+                print(f"  Enrollment tăng thêm:          {(enrollment_after - enrollment_before) / 1024:>10.1f} KiB")
+            print(f"  Dữ liệu packed:                {packed_bytes / 1024:>10.1f} KiB")
+            print(f"\nNạp {len(rows)} dòng: {rows_load_s:.2f}s, pack_rows: {pack_s:.2f}s\n")
+
+            user = users[0]
+            lesson = lessons[-1]
+
+            def write_rows():
+                LessonProgress.objects.update_or_create(
+                    user=user, lesson=lesson, defaults={"watched": True, "completed_at": timezone.now()}
+                )
+
+            def write_packed():
+                set_progress(user.pk, lesson.pk, True, timezone.now())
+
+            def read_rows():
+                list(LessonProgress.objects.filter(user=user, lesson__section__course=course, watched=True)
+                     .values_list("lesson_id", "completed_at"))
+
+            def read_packed():
+                unpack(Enrollment.objects.filter(user=user, course=course).values_list("progress", flat=True).get())
+
+            print(f"{'thao tác':<28}{'rows (ms)':>12}{'packed (ms)':>14}")
+            print(f"{'ghi một bài':<28}{timed(write_rows, args.repeat):>12.3f}{timed(write_packed, args.repeat):>14.3f}")
+            print(f"{'đọc tiến độ một khóa học':<28}{timed(read_rows, args.repeat):>12.3f}"
+                  f"{timed(read_packed, args.repeat):>14.3f}")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="mysite.settings")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--lessons", type=int, default=100)
+    parser.add_argument("--watched", type=float, default=0.5, help="Tỉ lệ bài mỗi user đã học")
+    parser.add_argument("--repeat", type=int, default=200, help="Số lần lặp khi đo đọc/ghi")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", args.settings)
+    import django
+    django.setup()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
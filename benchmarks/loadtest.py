@@ -0,0 +1,270 @@
+"""
+Tải đồng thời lên một server đang chạy ở máy local, đo throughput, độ trễ p50/p95/p99 và tỉ lệ lỗi.
+
+    # 1. Chạy server như production (SQLite hoặc Postgres local)
+    DATABASE_URL=sqlite:////tmp/load.db MEDIA_STORAGE=local WEB_CONCURRENCY=4 gunicorn mysite.asgi:application
+    #    Mọi user ảo đăng nhập từ cùng một IP nên phải nới throttle đăng nhập trên server, nếu không
+    #    /api/token/ trả 429 sau ~20 lượt/phút và các kịch bản cần đăng nhập bị tính là lỗi:
+    #    LOGIN_THROTTLE_IP_RATE=10000/min LOGIN_THROTTLE_USERNAME_RATE=1000/min gunicorn ...
+    # 2. Tạo user ảo (một lần, dùng cùng DATABASE_URL với server)
+    DATABASE_URL=sqlite:////tmp/load.db python benchmarks/loadtest.py --create-users 50
+    # 3. Bắn tải
+    python benchmarks/loadtest.py --base-url http://localhost:8000 --users 50 --duration 60
+    python benchmarks/loadtest.py --scenario enroll --scenario register_event --users 200
+
+Mỗi user ảo lặp lại các kịch bản (chọn ngẫu nhiên theo trọng số) tới khi hết thời gian:
+  browse          xem danh sách khóa học, bảng xếp hạng, nội dung một khóa học, sự kiện
+  login           lấy JWT qua /api/token/
+  enroll          đăng ký một khóa học rồi hủy (đường EnrollmentViewSet.create)
+  learn           đăng ký khóa học, đánh dấu đã xem vài bài học
+  register_event  đăng ký rồi hủy đăng ký sự kiện
+Status 4xx mang nghĩa nghiệp vụ (ví dụ "đã đăng ký rồi") được tính là hợp lệ cho bước tương ứng.
+Không lấy được JWT (sai mật khẩu, bị throttle 429...) thì kịch bản bị bỏ dở và được báo riêng.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+USERNAME = "load-{}"
+PASSWORD = "load-test-password"
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failures = defaultdict(lambda: defaultdict(int))
+        self.aborted = defaultdict(lambda: defaultdict(int))
+
+    def abort(self, scenario, reason):
+        # Kịch bản dừng giữa chừng: không có request để đo độ trễ, đếm riêng
+        self.aborted[scenario][reason] += 1
+
+    def add(self, name, seconds, ok, reason=None):
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+            self.failures[name][reason] += 1
+
+
+class VirtualUser:
+    def __init__(self, index, session, base_url, catalog, stats):
+        self.username = USERNAME.format(index)
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.catalog = catalog
+        self.stats = stats
+        self.token = None
+        self.user_id = None
+
+    async def request(self, name, method, path, expected=(200,), auth=False, **kwargs):
+        # aiohttp tự gửi Accept-Encoding (gzip, thêm br nếu có Brotli) và tự giải nén
+        headers = {}
+        if auth and self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        start = time.perf_counter()
+        try:
+            async with self.session.request(method, self.base_url + path, headers=headers, **kwargs) as response:
+                body = await response.read()
+                ok = response.status in expected
+                self.stats.add(name, time.perf_counter() - start, ok, f"HTTP {response.status}")
+                if ok and body and response.content_type == "application/json":
+                    return await response.json()
+                return None
+        except (asyncio.TimeoutError, aiohttp.ClientError) as exc:
+            self.stats.add(name, time.perf_counter() - start, False, type(exc).__name__)
+            return None
+
+    # ---- Kịch bản ----
+
+    async def browse(self):
+        await self.request("GET courses", "GET", "/api/courses/")
+        await self.request("GET latest-with-students", "GET", "/api/courses/latest-with-students/")
+        if self.catalog["courses"]:
+            course_id = random.choice(self.catalog["courses"])
+            await self.request("GET sections-with-lessons", "GET", f"/api/courses/{course_id}/sections-with-lessons/")
+        await self.request("GET events", "GET", "/api/events/?upcoming=true")
+
+    async def obtain_token(self):
+        data = await self.request(
+            "POST token", "POST", "/api/token/", json={"username": self.username, "password": PASSWORD},
+        )
+        self.token = (data or {}).get("access")
+        if self.token and self.user_id is None:
+            me = await self.request("GET auth/user", "GET", "/api/auth/user/", auth=True)
+            self.user_id = (me or {}).get("id")
+        return self.token is not None
+
+    async def login(self):
+        if not await self.obtain_token():
+            self.stats.abort("login", "không lấy được JWT")
+
+    async def ensure_login(self, scenario):
+        if self.token is None and not await self.obtain_token():
+            self.stats.abort(scenario, "đăng nhập thất bại")
+            return False
+        return True
+
+    async def enroll(self):
+        if not await self.ensure_login("enroll") or not self.catalog["courses"]:
+            return
+        course_id = random.choice(self.catalog["courses"])
+        enrollment = await self.request(
+            "POST enrollments", "POST", "/api/enrollments/", expected=(201, 400), auth=True,
+            json={"course_id": course_id},
+        )
+        if enrollment and enrollment.get("id"):
+            await self.request(
+                "DELETE enrollment", "DELETE", f"/api/enrollments/{enrollment['id']}/", expected=(204,), auth=True,
+            )
+
+    async def learn(self):
+        if not await self.ensure_login("learn") or not self.catalog["courses"]:
+            return
+        course_id = random.choice(self.catalog["courses"])
+        await self.request(
+            "POST enrollments", "POST", "/api/enrollments/", expected=(201, 400), auth=True,
+            json={"course_id": course_id},
+        )
+        sections = await self.request(
+            "GET sections-with-lessons", "GET", f"/api/courses/{course_id}/sections-with-lessons/",
+        ) or []
+        lessons = [lesson["id"] for section in sections for lesson in section.get("lessons", [])]
+        for lesson_id in random.sample(lessons, min(3, len(lessons))):
+            await self.request(
+                "POST lessonprogresses", "POST", "/api/lessonprogresses/", expected=(201, 400), auth=True,
+                json={"user": self.user_id, "lesson": lesson_id, "watched": True},
+            )
+
+    async def register_event(self):
+        if not await self.ensure_login("register_event") or not self.catalog["events"]:
+            return
+        event_id = random.choice(self.catalog["events"])
+        await self.request(
+            "POST event-registers", "POST", "/api/event-registers/", expected=(201, 400), auth=True,
+            json={"event_id": event_id},
+        )
+        await self.request(
+            "DELETE event-register", "DELETE", f"/api/event-registers/{event_id}/", expected=(204, 404), auth=True,
+        )
+
+    async def run(self, scenarios, weights, deadline):
+        while time.monotonic() < deadline:
+            await getattr(self, random.choices(scenarios, weights)[0])()
+
+
+SCENARIOS = {"browse": 5, "login": 1, "enroll": 2, "learn": 2, "register_event": 2}
+
+
+async def load_catalog(session, base_url):
+    catalog = {"courses": [], "events": []}
+    for key, path in (("courses", "/api/courses/"), ("events", "/api/events/")):
+        async with session.get(base_url.rstrip("/") + path) as response:
+            if response.status == 200:
+                catalog[key] = [item["id"] for item in await response.json()]
+    return catalog
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report(stats, elapsed):
+    total = sum(len(values) for values in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    aborted = sum(sum(reasons.values()) for reasons in stats.aborted.values())
+    print(f"\n{total} request trong {elapsed:.1f}s: {total / elapsed:.1f} req/s, lỗi {errors} ({errors / max(total, 1):.1%}), "
+          f"kịch bản bỏ dở {aborted}\n")
+    print(f"{'bước':<28}{'n':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'lỗi':>8}")
+    for name in sorted(stats.latencies):
+        values = sorted(stats.latencies[name])
+        print(
+            f"{name:<28}{len(values):>7}{len(values) / elapsed:>9.1f}"
+            f"{percentile(values, 0.50) * 1000:>9.1f}{percentile(values, 0.95) * 1000:>9.1f}"
+            f"{percentile(values, 0.99) * 1000:>9.1f}{values[-1] * 1000:>9.1f}"
+            f"{stats.errors[name] / len(values):>8.1%}"
+        )
+    for name, reasons in sorted(stats.failures.items()):
+        print(f"  {name}: " + ", ".join(f"{reason} × {count}" for reason, count in reasons.items()))
+
+    if stats.aborted:
+        print("\nKịch bản bị bỏ dở:")
+        for scenario, reasons in sorted(stats.aborted.items()):
+            print(f"  {scenario}: " + ", ".join(f"{reason} × {count}" for reason, count in reasons.items()))
+
+
+async def run_load(args):
+    scenarios = args.scenario or list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in scenarios]
+    stats = Stats()
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.users)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        catalog = await load_catalog(session, args.base_url)
+        print(f"{len(catalog['courses'])} khóa học, {len(catalog['events'])} sự kiện; "
+              f"{args.users} user ảo, {args.duration}s, kịch bản: {', '.join(scenarios)}")
+        users = [VirtualUser(index, session, args.base_url, catalog, stats) for index in range(args.users)]
+        start = time.monotonic()
+        deadline = start + args.duration
+        # Khởi động dần trong ramp-up giây để không dồn mọi lượt login vào cùng một lúc
+        async def start_user(user, delay):
+            await asyncio.sleep(delay)
+            await user.run(scenarios, weights, deadline)
+
+        await asyncio.gather(*(
+            start_user(user, args.ramp_up * index / args.users) for index, user in enumerate(users)
+        ))
+        report(stats, time.monotonic() - start)
+
+
+def create_users(count, settings_module):
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import Group, User
+
+    password = make_password(PASSWORD)  # băm một lần cho mọi user
+    User.objects.bulk_create(
+        [User(username=USERNAME.format(index), password=password) for index in range(count)],
+        ignore_conflicts=True,
+    )
+    group, _ = Group.objects.get_or_create(name="user")
+    group.user_set.add(*User.objects.filter(username__in=[USERNAME.format(index) for index in range(count)]))
+    print(f"Đã có {count} user {USERNAME.format('N')} / {PASSWORD}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Số user ảo chạy đồng thời")
+    parser.add_argument("--duration", type=float, default=30, help="Thời gian bắn tải (giây)")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Thời gian khởi động dần các user ảo (giây)")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout mỗi request (giây)")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Chỉ chạy kịch bản này, lặp lại được")
+    parser.add_argument("--create-users", type=int, metavar="N", help="Tạo N user ảo trong database rồi thoát")
+    parser.add_argument("--settings", default="mysite.settings")
+    args = parser.parse_args()
+
+    if args.create_users:
+        create_users(args.create_users, args.settings)
+        return
+    asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Đo CPU mà một đợt dò mật khẩu vào /api/token/ tiêu tốn, khi bật và tắt throttle đăng nhập.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/login_throttle.py
+    python benchmarks/login_throttle.py --attempts 200 --scenario one-ip
+
+Gọi endpoint bằng test client trong cùng process (không qua mạng) nên thời gian CPU đo được
+chính là phần worker phải gánh. Mỗi kịch bản chạy hai lần, throttle tắt rồi bật:
+  one-ip     một IP thử nhiều username (credential stuffing từ một máy)
+  many-ips   nhiều IP cùng dò một username (botnet nhắm một tài khoản)
+  spoof-xff  một máy, mỗi lượt gửi X-Forwarded-For giả khác nhau để mong có bucket mới
+Khi bật throttle, số lần băm mật khẩu chỉ còn xấp xỉ dung lượng bucket, dù số lượt thử tăng.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = ("one-ip", "many-ips", "spoof-xff")
+
+
+def attempt(scenario, index):
+    """(username, header META) của lượt thử thứ index."""
+    if scenario == "one-ip":
+        return f"victim-{index}", {"REMOTE_ADDR": "203.0.113.7"}
+    if scenario == "spoof-xff":
+        # Phần đầu do client tự ghi, phần cuối là IP thật mà proxy nối thêm: với NUM_PROXIES=0
+        # (REMOTE_ADDR) hay 1 (Render) thì key vẫn là 203.0.113.7
+        forged = f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+        return f"victim-{index}", {"REMOTE_ADDR": "203.0.113.7", "HTTP_X_FORWARDED_FOR": f"{forged}, 203.0.113.7"}
+    return "admin", {"REMOTE_ADDR": f"198.51.{index // 250 % 256}.{index % 250 + 1}"}
+
+
+def run(client, scenario, attempts):
+    from django.contrib.auth import hashers
+
+    # Đếm số lần thật sự băm mật khẩu (kể cả username không tồn tại, Django vẫn băm một lần)
+    hashed = 0
+    original = hashers.PBKDF2PasswordHasher.encode
+
+    def counting_encode(self, *args, **kwargs):
+        nonlocal hashed
+        hashed += 1
+        return original(self, *args, **kwargs)
+
+    statuses = {}
+    hashers.PBKDF2PasswordHasher.encode = counting_encode
+    try:
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        for index in range(attempts):
+            username, meta = attempt(scenario, index)
+            response = client.post(
+                "/api/token/", {"username": username, "password": "wrong-password"},
+                content_type="application/json", **meta,
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+    finally:
+        hashers.PBKDF2PasswordHasher.encode = original
+    return statuses, hashed, cpu, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="mysite.settings")
+    parser.add_argument("--attempts", type=int, default=100, help="Số lượt đăng nhập sai mỗi lần chạy")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Chỉ chạy kịch bản này, lặp lại được")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", args.settings)
+    import django
+    django.setup()
+
+    from django.core.cache import cache
+    from django.test import Client
+    from rest_framework.settings import api_settings
+
+    from courses.views import CustomTokenObtainPairView
+
+    logging.getLogger("django.request").setLevel(logging.ERROR)  # bỏ cảnh báo cho từng response 401/429
+
+    rates = CustomTokenObtainPairView.throttle_classes[0].THROTTLE_RATES
+    print(f"login_ip={rates.get('login_ip')}, login_username={rates.get('login_username')}, "
+          f"NUM_PROXIES={api_settings.NUM_PROXIES}, {args.attempts} lượt mỗi lần\n")
+    print(f"{'kịch bản':<12}{'throttle':>10}{'200/401':>9}{'429':>7}{'băm':>7}{'CPU s':>9}{'wall s':>9}{'CPU ms/lượt':>13}")
+
+    client = Client()
+    throttle_classes = CustomTokenObtainPairView.throttle_classes
+    for scenario in args.scenario or SCENARIOS:
+        for enabled in (False, True):
+            cache.clear()
+            CustomTokenObtainPairView.throttle_classes = throttle_classes if enabled else []
+            try:
+                statuses, hashed, cpu, wall = run(client, scenario, args.attempts)
+            finally:
+                CustomTokenObtainPairView.throttle_classes = throttle_classes
+            passed = statuses.get(200, 0) + statuses.get(401, 0)
+            print(
+                f"{scenario:<12}{'bật' if enabled else 'tắt':>10}{passed:>9}{statuses.get(429, 0):>7}{hashed:>7}"
+                f"{cpu:>9.2f}{wall:>9.2f}{cpu / args.attempts * 1000:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
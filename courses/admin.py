@@ -1,10 +1,156 @@
 from django.contrib import admin
-from .models import Course, Section, Lesson, Enrollment, LessonProgress, Event, EventRegister
-
-admin.site.register(Course)
-admin.site.register(Section)
-admin.site.register(Lesson)
-admin.site.register(Enrollment)
-admin.site.register(LessonProgress)
-admin.site.register(Event)
-admin.site.register(EventRegister)
+from django.db import models
+from .models import Course, Section, Lesson, Enrollment, LessonProgress, Event, EventRegister, SlowQuery, Task
+from .tasks import purge_course
+
+# Các bảng lớn: __str__ của model đọc qua FK (user.username, course.title...) nên luôn
+# select_related đúng các FK đó, dùng autocomplete thay cho dropdown chứa mọi User/Course,
+# và tắt show_full_result_count để admin không phải COUNT(*) toàn bảng mỗi lần lọc.
+# search_fields dùng "^" (istartswith). Trên PostgreSQL đó là UPPER(col::text) LIKE 'ABC%', chỉ dùng được
+# index trên UPPER(col) text_pattern_ops: title của Course/Section/Lesson/Event có index này (title_search_index).
+# Các cột còn lại (username, Task.name, SlowQuery.view) vẫn quét bảng khi tìm kiếm.
+
+
+def cascade_models(model, seen=None):
+    # Các model bị xóa theo (on_delete=CASCADE) khi xóa model, tính trên schema nên không tốn query
+    seen = set() if seen is None else seen
+    for relation in model._meta.related_objects:
+        related = relation.related_model
+        if relation.on_delete is models.CASCADE and related not in seen:
+            seen.add(related)
+            cascade_models(related, seen)
+    return seen
+
+
+@admin.register(Course)
+class CourseAdmin(admin.ModelAdmin):
+    list_display = ('title', 'is_paid', 'price', 'created_at', 'archived_at')
+    list_filter = ('is_paid', ('archived_at', admin.EmptyFieldListFilter))
+    search_fields = ('^title',)
+    date_hierarchy = 'created_at'
+    # Thêm pk để autocomplete phân trang ổn định khi trùng created_at
+    ordering = ('-created_at', '-pk')
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Trang sửa mở được cả khóa học đã lưu trữ để khôi phục (xóa trống archived_at)
+        queryset = Course.all_objects.all()
+        ordering = self.get_ordering(request)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        # Danh sách, ô tìm kiếm và autocomplete (Section, Enrollment...) chỉ có khóa học đang hiển thị,
+        # trừ khi lọc theo "archived at" để tìm khóa đã lưu trữ
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if 'archived_at__isempty' not in request.GET:
+            queryset = queryset.filter(archived_at__isnull=True)
+        return queryset, may_have_duplicates
+
+    # Xóa trong admin cũng là lưu trữ + xóa hẳn ở nền, tránh Collector load toàn bộ dữ liệu liên quan
+    def delete_model(self, request, obj):
+        obj.archive()
+        purge_course.delay(obj.pk)
+
+    def get_deleted_objects(self, objs, request):
+        # Trang xác nhận không liệt kê toàn bộ sections/lessons/enrollments liên quan (không chạy Collector),
+        # nhưng vẫn đòi quyền xóa các model bị xóa theo như trang mặc định của Django
+        perms_needed = {
+            model._meta.verbose_name
+            for model in cascade_models(Course)
+            if model in self.admin_site._registry
+            and not self.admin_site._registry[model].has_delete_permission(request)
+        }
+        return [str(obj) for obj in objs], {}, perms_needed, []
+
+    def delete_queryset(self, request, queryset):
+        for course in queryset:
+            self.delete_model(request, course)
+
+
+@admin.register(Section)
+class SectionAdmin(admin.ModelAdmin):
+    list_display = ('title', 'course', 'order')
+    list_select_related = ('course',)
+    ordering = ('course', 'order')
+    search_fields = ('^title', '^course__title')
+    autocomplete_fields = ('course',)
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Kết quả autocomplete hiển thị Section.__str__ (cần course)
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        return queryset.select_related('course'), may_have_duplicates
+
+
+@admin.register(Lesson)
+class LessonAdmin(admin.ModelAdmin):
+    list_display = ('title', 'section', 'order')
+    list_select_related = ('section', 'section__course')
+    ordering = ('section', 'order')
+    search_fields = ('^title', '^section__course__title')
+    autocomplete_fields = ('section',)
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Autocomplete trong LessonProgressAdmin hiển thị Lesson.__str__ (cần section)
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        return queryset.select_related('section'), may_have_duplicates
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ('user', 'course', 'enrolled_at')
+    list_select_related = ('user', 'course')
+    search_fields = ('^user__username', '^course__title')
+    autocomplete_fields = ('user', 'course')
+    date_hierarchy = 'enrolled_at'
+    show_full_result_count = False
+
+
+@admin.register(LessonProgress)
+class LessonProgressAdmin(admin.ModelAdmin):
+    list_display = ('user', 'lesson', 'watched', 'completed_at')
+    list_select_related = ('user', 'lesson', 'lesson__section')
+    list_filter = ('watched',)
+    search_fields = ('^user__username', '^lesson__title')
+    autocomplete_fields = ('user', 'lesson')
+    date_hierarchy = 'completed_at'
+    show_full_result_count = False
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_display = ('title', 'starts_at', 'price', 'category', 'location', 'attendees', 'registered_count')
+    list_filter = ('category',)
+    search_fields = ('^title',)
+    autocomplete_fields = ('created_by',)
+    date_hierarchy = 'starts_at'
+    show_full_result_count = False
+
+
+@admin.register(EventRegister)
+class EventRegisterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'event', 'created_at')
+    list_select_related = ('user', 'event')
+    search_fields = ('^user__username', '^event__title')
+    autocomplete_fields = ('user', 'event')
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('^name',)
+    date_hierarchy = 'run_at'
+    show_full_result_count = False
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('view', 'calls', 'total_ms', 'max_ms', 'last_seen', 'sql')
+    search_fields = ('^view',)
+    ordering = ('-total_ms',)
+    date_hierarchy = 'last_seen'
+    show_full_result_count = False
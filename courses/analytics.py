@@ -0,0 +1,165 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Min
+from django.utils import timezone
+
+from .cache import cached_data
+from .models import Enrollment, Lesson, LessonProgress, Section
+from .progress import packed_store_enabled
+
+# Báo cáo cho admin: lấy dữ liệu dạng cột bằng values_list rồi tính bằng numpy/pandas trong một lượt,
+# thay cho vòng lặp Python hay một query cho mỗi ô. Kết quả cache theo ngày (key có ngày hiện tại).
+
+DAY = 24 * 60 * 60
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def cohort_matrix(weeks):
+    """
+    Cohort theo tuần đăng ký tài khoản: ô (c, k) là tỉ lệ user của cohort c đã đăng ký
+    khóa học đầu tiên trong vòng k tuần kể từ khi tạo tài khoản (cộng dồn).
+    Ô chưa đủ thời gian quan sát là None.
+    """
+    # numpy/pandas chỉ cần khi admin xem báo cáo, không import lúc worker web khởi động
+    import numpy as np
+    import pandas as pd
+
+    first_week = week_start(timezone.localdate()) - timedelta(weeks=weeks - 1)
+    since = timezone.make_aware(datetime.combine(first_week, time.min))
+
+    users = pd.DataFrame.from_records(
+        User.objects.filter(date_joined__gte=since).values_list('id', 'date_joined'),
+        columns=['user_id', 'date_joined'],
+    )
+    first_enrollments = pd.DataFrame.from_records(
+        Enrollment.objects.filter(user__date_joined__gte=since)
+        .values_list('user_id').annotate(first_enrolled=Min('enrolled_at')),
+        columns=['user_id', 'first_enrolled'],
+    )
+
+    cohorts = np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(0, dtype=np.int64)
+    if not users.empty:
+        joined = pd.to_datetime(users['date_joined'], utc=True).dt.tz_convert(settings.TIME_ZONE)
+        days_since_start = (joined.dt.tz_localize(None).dt.normalize() - pd.Timestamp(first_week)).dt.days
+        cohorts = (days_since_start // 7).to_numpy(dtype=np.int64)
+
+        users = users.merge(first_enrollments, on='user_id', how='left')
+        enrolled = users['first_enrolled'].notna().to_numpy()
+        delay = pd.to_datetime(users['first_enrolled'], utc=True) - pd.to_datetime(users['date_joined'], utc=True)
+        offsets = (delay.dt.days.fillna(0).clip(lower=0) // 7).to_numpy(dtype=np.int64)
+        offsets = np.where(enrolled, offsets, weeks)  # chưa đăng ký: đưa ra ngoài ma trận
+
+    sizes = np.bincount(cohorts, minlength=weeks)[:weeks]
+    counts = np.zeros((weeks, weeks + 1), dtype=np.int64)
+    np.add.at(counts, (cohorts, np.minimum(offsets, weeks)), 1)
+    rates = counts[:, :weeks].cumsum(axis=1) / np.maximum(sizes, 1)[:, None]
+
+    # Cohort c (tuần thứ c) mới quan sát được tới tuần k = weeks - 1 - c
+    observed = np.add.outer(np.arange(weeks), np.arange(weeks)) < weeks
+
+    return [
+        {
+            'week_start': (first_week + timedelta(weeks=cohort)).isoformat(),
+            'users': int(sizes[cohort]),
+            'enrolled': [
+                round(float(rate), 4) if seen else None
+                for rate, seen in zip(rates[cohort], observed[cohort])
+            ],
+        }
+        for cohort in range(weeks)
+    ]
+
+
+def progress_pairs(course_id):
+    """Các cặp (user_id, lesson_id) đã học của những user đang đăng ký khóa học, dạng hai mảng numpy."""
+    import numpy as np
+
+    enrollments = Enrollment.objects.filter(course_id=course_id)
+    if packed_store_enabled():
+        user_ids, lesson_ids = [], []
+        for user_id, progress in enrollments.values_list('user_id', 'progress'):
+            # Mảng '<II' (lesson_id, completed_at): lấy thẳng cột lesson_id, không unpack từng phần tử
+            lessons = np.frombuffer(bytes(progress), dtype='<u4')[::2]
+            lesson_ids.append(lessons)
+            user_ids.append(np.full(len(lessons), user_id, dtype=np.int64))
+        if not lesson_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(user_ids), np.concatenate(lesson_ids).astype(np.int64)
+
+    rows = np.array(
+        LessonProgress.objects.filter(
+            watched=True, lesson__section__course_id=course_id, user_id__in=enrollments.values('user_id'),
+        ).values_list('user_id', 'lesson_id'),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    return rows[:, 0], rows[:, 1]
+
+
+def section_funnel(course_id):
+    """
+    Phễu theo section: số user đang đăng ký đã học ít nhất một bài của section (reached)
+    và đã học hết các bài của section (completed), theo thứ tự section trong khóa học.
+    """
+    import numpy as np
+    import pandas as pd
+
+    sections = list(Section.objects.filter(course_id=course_id).order_by('order', 'pk').values_list('id', 'title'))
+    enrolled = Enrollment.objects.filter(course_id=course_id).count()
+    lessons = np.array(
+        Lesson.objects.filter(section__course_id=course_id).values_list('id', 'section_id'), dtype=np.int64,
+    ).reshape(-1, 2)
+
+    # lesson_id -> vị trí section trong khóa học
+    position = pd.Series(np.arange(len(sections)), index=[section_id for section_id, _ in sections])
+    lesson_section = pd.Series(position.reindex(lessons[:, 1]).to_numpy(), index=lessons[:, 0])
+    lesson_counts = np.bincount(lesson_section.to_numpy(dtype=np.int64), minlength=len(sections))
+
+    user_ids, lesson_ids = progress_pairs(course_id)
+    watched = pd.DataFrame({
+        'user_id': user_ids,
+        'lesson_id': lesson_ids,
+        'section': lesson_section.reindex(lesson_ids).to_numpy(),
+    }).dropna().drop_duplicates(['user_id', 'lesson_id'])  # bỏ bài đã bị xóa khỏi khóa học
+    watched['section'] = watched['section'].astype(np.int64)
+
+    per_user = watched.groupby(['section', 'user_id']).size()
+    sections_of_user = per_user.index.get_level_values('section').to_numpy(dtype=np.int64)
+    reached = np.bincount(sections_of_user, minlength=len(sections))
+    finished = per_user.to_numpy() >= lesson_counts[sections_of_user]
+    completed = np.bincount(sections_of_user[finished], minlength=len(sections))
+
+    def rate(count, total):
+        return round(count / total, 4) if total else 0.0
+
+    funnel = []
+    previous = enrolled
+    for index, (section_id, title) in enumerate(sections):
+        funnel.append({
+            'id': section_id,
+            'title': title,
+            'lessons': int(lesson_counts[index]),
+            'reached': int(reached[index]),
+            'completed': int(completed[index]),
+            'reached_rate': rate(int(reached[index]), enrolled),
+            'completed_rate': rate(int(completed[index]), enrolled),
+            # Tỉ lệ rơi so với section trước (section đầu so với số người đăng ký)
+            'drop_off': round(1 - rate(int(reached[index]), previous), 4) if previous else 0.0,
+        })
+        previous = int(reached[index])
+    return {'course': course_id, 'enrolled': enrolled, 'sections': funnel}
+
+
+def cached_cohorts(weeks):
+    key = f'analytics:cohorts:{weeks}:{timezone.localdate().isoformat()}'
+    return cached_data(key, lambda: {'weeks': weeks, 'cohorts': cohort_matrix(weeks)}, DAY)
+
+
+def cached_funnel(course_id):
+    key = f'analytics:funnel:{course_id}:{timezone.localdate().isoformat()}'
+    return cached_data(key, lambda: section_funnel(course_id), DAY)
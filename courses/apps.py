@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "courses"
+
+    def ready(self):
+        from django.db.models.indexes import IndexExpression
+
+        from . import signals  # noqa: F401  purge cache CDN, hẹn tính lại gợi ý khi dữ liệu đổi
+        from .models import PatternOps
+
+        # Operator class đứng ngoài ngoặc của biểu thức: (UPPER("title")) text_pattern_ops
+        IndexExpression.register_wrappers(*IndexExpression.wrapper_classes, PatternOps)
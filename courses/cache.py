@@ -0,0 +1,42 @@
+import contextvars
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+
+
+def _store(key, data, ttl, stale_ttl):
+    # Lưu kèm thời điểm hết hạn "mềm"; entry còn nằm trong cache thêm stale_ttl giây để trả bản cũ
+    cache.set(key, (time.time() + ttl, data), ttl + stale_ttl)
+
+
+def _refresh(key, ttl, stale_ttl, build):
+    try:
+        _store(key, build(), ttl, stale_ttl)
+    finally:
+        cache.delete(f'{key}:refreshing')
+        connection.close()
+
+
+def cached_data(key, build, ttl, stale_ttl=0):
+    """
+    Trả về build() đã cache theo key (stale-while-revalidate).
+
+    Hết ttl thì vẫn trả bản cũ ngay, đồng thời một thread nền (chỉ một, nhờ cache.add
+    làm khóa) chạy lại build() để làm mới, nên request không phải chờ query.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        _store(key, data, ttl, stale_ttl)
+        return data
+
+    expires_at, data = entry
+    if expires_at <= time.time() and cache.add(f'{key}:refreshing', True, ttl or 30):
+        # copy_context để thread giữ các ContextVar của request (ví dụ đọc từ replica)
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run, args=(_refresh, key, ttl, stale_ttl, build), daemon=True
+        ).start()
+    return data
@@ -0,0 +1,69 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Surrogate key gắn vào response công khai để CDN/reverse proxy xóa đúng nhóm trang khi dữ liệu đổi:
+#   courses      danh sách khóa học, latest-with-students
+#   course-<id>  chi tiết một khóa học (kể cả ?expand=sections.lessons)
+#   events       danh sách sự kiện
+#   event-<id>   chi tiết một sự kiện
+COURSES = 'courses'
+EVENTS = 'events'
+
+
+def course_key(course_id):
+    return f'course-{course_id}'
+
+
+def event_key(event_id):
+    return f'event-{event_id}'
+
+
+def apply_policy(response, policy, keys):
+    """
+    Cho phép cache dùng chung (CDN) giữ response s_maxage giây và trả bản cũ thêm
+    stale_while_revalidate giây trong lúc lấy bản mới; trình duyệt luôn hỏi lại (max-age=0).
+    """
+    options = settings.EDGE_CACHE_POLICIES[policy]
+    patch_cache_control(
+        response, public=True, max_age=0,
+        s_maxage=options['s_maxage'], stale_while_revalidate=options['stale_while_revalidate'],
+    )
+    if keys:
+        response['Surrogate-Key'] = ' '.join(keys)
+
+
+class NoopPurger:
+    """Không có CDN phía trước (dev, test): trang cũ tự hết hạn theo s-maxage."""
+
+    def purge(self, keys):
+        pass
+
+
+class LoggingPurger:
+    """Chỉ ghi log các key cần xóa, để kiểm tra signal khi chạy local."""
+
+    def purge(self, keys):
+        logger.info("Purge surrogate keys: %s", ' '.join(keys))
+
+
+# Purger cho CDN thật (Fastly, Varnish...) chỉ cần method purge(keys) và đặt EDGE_CACHE_PURGER
+_purger = None
+
+
+def get_purger():
+    global _purger
+    if _purger is None:
+        _purger = import_string(settings.EDGE_CACHE_PURGER)()
+    return _purger
+
+
+def purge_on_commit(keys):
+    # Xóa sau khi commit, tránh CDN lấy lại đúng dữ liệu cũ trong lúc transaction còn mở
+    keys = sorted(set(keys))
+    transaction.on_commit(lambda: get_purger().purge(keys))
@@ -0,0 +1,155 @@
+import re
+from datetime import time, timedelta
+from decimal import Decimal, InvalidOperation
+
+# Đọc các giá trị Event.time / duration / price vốn được nhập tự do dạng chuỗi,
+# dùng cho migration backfill và cho serializer (client cũ vẫn gửi chuỗi).
+
+# Giờ thật: "9:30", "14h30", "9g30", "14h", "7 PM", "7:30 sa". Số đứng một mình không phải giờ.
+TIME_RE = re.compile(
+    r'(?<![\d/])(\d{1,2})\s*(?:[:hg]\s*(\d{2})(?!\d)|[hg](?![^\W\d_]))\s*(am|pm|sa|ch)?(?![^\W\d_])'
+    r'|(?<![\d/])(\d{1,2})\s*(am|pm|sa|ch)(?![^\W\d_])',
+    re.IGNORECASE,
+)
+# Thứ trong tuần và ngày tháng hay đứng trước giờ: "Thứ 7, 9h30", "CN 20/10 14:00"
+WEEKDAY_RE = re.compile(r'\b(?:thứ|thu|t)\s*[2-7]\b|\bcn\b|\bchủ\s*nhật\b|\bchu\s*nhat\b', re.IGNORECASE)
+DATE_RE = re.compile(r'\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b')
+RANGE_SEPARATOR_RE = re.compile(r'\s*(?:-|–|—|~|đến|den|to)\s*', re.IGNORECASE)
+
+DURATION_UNITS = [
+    (('tuần', 'tuan', 'weeks', 'week', 'w'), timedelta(weeks=1)),
+    (('ngày', 'ngay', 'days', 'day', 'd'), timedelta(days=1)),
+    (('tiếng', 'tieng', 'giờ', 'gio', 'hours', 'hour', 'hrs', 'hr', 'h'), timedelta(hours=1)),
+    (('phút', 'phut', 'minutes', 'minute', 'mins', 'min', 'p', 'm'), timedelta(minutes=1)),
+]
+# Số kèm chữ đứng ngay sau (nếu có); chữ không phải đơn vị đã biết ("3 tuần" thì có, "3 tháng" thì không) -> None
+DURATION_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*([^\W\d_]*)')
+DURATION_RANGE_RE = re.compile(r'\d\s*(?:-|–|—|~)\s*\d')
+
+FREE_WORDS = ('miễn phí', 'mien phi', 'free')
+THOUSANDS_RE = re.compile(r'^\d{1,3}([.,]\d{3})+$')
+
+
+def _clock(match):
+    if match.group(1) is not None:
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    else:
+        hour, minute, meridiem = int(match.group(4)), 0, match.group(5)
+    meridiem = (meridiem or '').lower()
+    if meridiem and hour > 12:
+        return None
+    if meridiem in ('pm', 'ch') and hour < 12:
+        hour += 12
+    elif meridiem in ('am', 'sa') and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def parse_time_range(text):
+    """
+    'Thứ 7, 9h30' -> (09:30, None), '19:00 - 21:00' -> (19:00, 21:00).
+    Không có giờ, có số lạ ngoài giờ/thứ/ngày, hoặc nhiều giờ mà không phải một khoảng -> None.
+    """
+    text = DATE_RE.sub(' ', WEEKDAY_RE.sub(' ', text or ''))
+    matches = list(TIME_RE.finditer(text))
+    if not matches or len(matches) > 2:
+        return None
+    if re.search(r'\d', TIME_RE.sub(' ', text)):
+        return None  # "9 - 11h", "phòng 3, 14h": không chắc số nào là giờ
+    times = [_clock(match) for match in matches]
+    if None in times:
+        return None
+    if len(times) == 1:
+        return times[0], None
+    if not RANGE_SEPARATOR_RE.fullmatch(text[matches[0].end():matches[1].start()]):
+        return None  # "9:00 hoặc 14:00"
+    return times[0], times[1]
+
+
+def parse_time_text(text):
+    """Giờ bắt đầu của parse_time_range; không đọc được hoặc mơ hồ -> None."""
+    parsed = parse_time_range(text)
+    return parsed[0] if parsed else None
+
+
+def range_duration(start, end):
+    """Thời lượng của khoảng giờ start - end, qua nửa đêm thì cộng một ngày."""
+    minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+    return timedelta(minutes=minutes % (24 * 60)) or None
+
+
+def parse_duration_text(text):
+    """'2 giờ', '1h30', '90 phút', '1:30', '1.5 hours', '3 tuần' -> timedelta; đơn vị lạ hay không đọc được -> None."""
+    text = (text or '').strip()
+    clock = re.fullmatch(r'(\d{1,2}):(\d{2})(?::(\d{2}))?', text)
+    if clock:
+        hours, minutes, seconds = (int(part or 0) for part in clock.groups())
+        return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    if DURATION_RANGE_RE.search(text):
+        return None  # "2-3 giờ"
+
+    total = timedelta()
+    previous_unit = None
+    for number, unit in DURATION_RE.findall(text):
+        value = float(number.replace(',', '.'))
+        if unit:
+            step = next((step for units, step in DURATION_UNITS if unit.lower() in units), None)
+            if step is None:
+                return None
+        elif previous_unit == timedelta(hours=1):
+            # "1h30": số không có đơn vị ngay sau giờ là phút
+            step = timedelta(minutes=1)
+        else:
+            # Số trơn: nhỏ thì hiểu là giờ, lớn thì là phút ("2" -> 2 giờ, "90" -> 90 phút)
+            step = timedelta(hours=1) if value <= 24 else timedelta(minutes=1)
+        total += value * step
+        previous_unit = step
+    return total or None
+
+
+def format_duration(value):
+    """timedelta -> chuỗi hiển thị giống dữ liệu cũ: '2 giờ', '1 giờ 30 phút', '45 phút'."""
+    if value is None:
+        return None
+    minutes = int(value.total_seconds() // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if days:
+        parts.append(f"{days} ngày")
+    if hours:
+        parts.append(f"{hours} giờ")
+    if minutes or not parts:
+        parts.append(f"{minutes} phút")
+    return ' '.join(parts)
+
+
+def parse_price_text(text):
+    """'Miễn phí' -> 0, '500.000đ' / '500,000 VNĐ' -> 500000, '200k' -> 200000; trống hay không đọc được -> None."""
+    text = (str(text) if text is not None else '').strip().lower()
+    if not text:
+        return None  # chưa nhập giá, khác với miễn phí
+    if any(word in text for word in FREE_WORDS):
+        return Decimal(0)
+
+    match = re.search(r'\d[\d.,]*', text)
+    if not match:
+        return None
+    number = match.group().rstrip('.,')
+    if THOUSANDS_RE.match(number):
+        number = re.sub(r'[.,]', '', number)
+    else:
+        number = number.replace(',', '.')
+    try:
+        price = Decimal(number)
+    except InvalidOperation:
+        return None
+
+    suffix = text[match.end():].lstrip()
+    if suffix.startswith('k'):
+        price *= 1000
+    elif suffix.startswith(('tr', 'triệu', 'm')):
+        price *= 1000000
+    return price
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.recommendations import refresh_similarities
+
+
+class Command(BaseCommand):
+    help = "Tính trước bảng khóa học tương tự (CourseSimilarity) từ dữ liệu đăng ký"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Tính lại toàn bộ thay vì chỉ các khóa học có thay đổi")
+        parser.add_argument('--top-k', type=int, help="Số khóa học tương tự lưu cho mỗi khóa học")
+
+    def handle(self, *args, full, top_k, **options):
+        updated = refresh_similarities(full=full, k=top_k)
+        self.stdout.write(self.style.SUCCESS(f"Đã cập nhật gợi ý cho {updated} khóa học"))
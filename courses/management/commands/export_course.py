@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.serializers import CourseTreeSerializer
+
+
+class Command(BaseCommand):
+    help = "Xuất một khóa học (kèm sections và lessons) ra file JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('-o', '--output', help="File JSON đầu ra, mặc định in ra stdout")
+
+    def handle(self, *args, course_id, output, **options):
+        try:
+            course = CourseTreeSerializer.prefetch(Course.objects.all()).get(pk=course_id)
+        except Course.DoesNotExist:
+            raise CommandError(f"Không tìm thấy khóa học {course_id}")
+
+        document = json.dumps(CourseTreeSerializer(course).data, ensure_ascii=False, indent=2)
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(document)
+        else:
+            self.stdout.write(document)
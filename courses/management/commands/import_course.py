@@ -0,0 +1,26 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.serializers import CourseTreeSerializer
+
+
+class Command(BaseCommand):
+    help = "Tạo khóa học từ file JSON (định dạng của export_course) trong một transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File JSON, '-' để đọc từ stdin")
+
+    def handle(self, *args, path, **options):
+        if path == '-':
+            data = json.load(sys.stdin)
+        else:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+
+        serializer = CourseTreeSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, ensure_ascii=False))
+        course = serializer.save()
+        self.stdout.write(self.style.SUCCESS(f"Đã tạo khóa học {course.pk}: {course.title}"))
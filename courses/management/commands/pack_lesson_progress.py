@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from courses.models import LessonProgress
+from courses.progress import pack_rows
+from courses.tasks import delete_in_batches
+
+
+class Command(BaseCommand):
+    help = "Chuyển tiến độ học từ bảng LessonProgress sang Enrollment.progress (LESSON_PROGRESS_STORE = 'packed')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Số enrollment mỗi transaction")
+        parser.add_argument(
+            '--delete-rows', action='store_true',
+            help="Xóa bảng LessonProgress sau khi chuyển (chỉ dùng khi đã bật packed store)",
+        )
+
+    def handle(self, *args, batch_size, delete_rows, **options):
+        enrollments, lessons = pack_rows(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Đã chuyển {lessons} bài học vào {enrollments} lượt đăng ký"))
+
+        if delete_rows:
+            if settings.LESSON_PROGRESS_STORE != 'packed':
+                self.stderr.write("LESSON_PROGRESS_STORE chưa phải 'packed', bỏ qua --delete-rows")
+                return
+            deleted = delete_in_batches(LessonProgress.objects.all(), settings.PURGE_BATCH_SIZE)
+            self.stdout.write(f"Đã xóa {deleted} dòng LessonProgress")
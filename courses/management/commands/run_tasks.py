@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from importlib import import_module
+from importlib.util import find_spec
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from courses.task_queue import claim_tasks, registry, run_task
+
+
+def autodiscover_tasks():
+    # Import <app>.tasks của mọi app để các hàm @task tự đăng ký
+    for app_config in apps.get_app_configs():
+        module = f"{app_config.name}.tasks"
+        if find_spec(module):
+            import_module(module)
+
+
+def execute(task_obj):
+    try:
+        return run_task(task_obj)
+    finally:
+        # Mỗi thread có kết nối DB riêng, đóng lại sau mỗi task
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Chạy worker xử lý hàng đợi task nền (bảng courses.Task)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help="Số task chạy song song tối đa")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Số giây chờ khi hàng đợi rỗng")
+        parser.add_argument('--once', action='store_true', help="Xử lý hết task đến hạn rồi thoát")
+        parser.add_argument('--task', action='append', dest='names', help="Chỉ chạy task có tên này (lặp lại được)")
+
+    def handle(self, *args, concurrency, poll_interval, once, names, **options):
+        autodiscover_tasks()
+        self.stdout.write(f"Worker sẵn sàng với {len(registry)} task, concurrency={concurrency}")
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                while True:
+                    close_old_connections()
+                    free_slots = concurrency - len(running)
+                    claimed = claim_tasks(free_slots, names=names) if free_slots else []
+                    for task_obj in claimed:
+                        running.add(executor.submit(execute, task_obj))
+
+                    if running:
+                        done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    elif once:
+                        break
+                    else:
+                        time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                self.stdout.write("Đang dừng worker, chờ các task đang chạy...")
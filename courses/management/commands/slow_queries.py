@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import SlowQuery
+
+ORDERINGS = {'total': '-total_ms', 'max': '-max_ms', 'calls': '-calls'}
+
+
+class Command(BaseCommand):
+    help = "In các query chậm nhất ghi bởi SlowQueryMiddleware (SLOW_QUERY_LOG=True)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order', choices=ORDERINGS, default='total', help="Sắp xếp theo tổng, max hay số lần")
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--view', help="Chỉ xem query của view có tên bắt đầu bằng chuỗi này")
+        parser.add_argument('--plans', action='store_true', help="In kèm EXPLAIN đã lấy mẫu")
+        parser.add_argument('--reset', action='store_true', help="Xóa dữ liệu đã gom sau khi in")
+
+    def handle(self, *args, order, limit, view, plans, reset, **options):
+        queries = SlowQuery.objects.order_by(ORDERINGS[order])
+        if view:
+            queries = queries.filter(view__startswith=view)
+
+        for rank, query in enumerate(queries[:limit], start=1):
+            average = query.total_ms / query.calls if query.calls else 0
+            self.stdout.write(self.style.WARNING(
+                f"#{rank} {query.view}  {query.calls} lần, tổng {query.total_ms:.1f} ms, "
+                f"tb {average:.1f} ms, max {query.max_ms:.1f} ms  [{query.fingerprint[:12]}]"
+            ))
+            self.stdout.write(f"    {query.sql}")
+            if plans and query.plan:
+                for line in query.plan.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        if reset:
+            deleted, _ = queries.delete()
+            self.stdout.write(f"Đã xóa {deleted} dòng")
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_task'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='title',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
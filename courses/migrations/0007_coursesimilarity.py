@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_title_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='courses.course')),
+                ('similar_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', '-score'], name='courses_similarity_rank')],
+                'unique_together': {('course', 'similar_course')},
+            },
+        ),
+    ]
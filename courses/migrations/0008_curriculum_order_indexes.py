@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_coursesimilarity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['section', 'order'], name='courses_lesson_section_order'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['course', 'order'], name='courses_section_course_order'),
+        ),
+    ]
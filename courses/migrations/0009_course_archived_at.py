@@ -0,0 +1,22 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_curriculum_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['-created_at'], name='courses_course_active_created'),
+        ),
+    ]
@@ -0,0 +1,243 @@
+import re
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Bản sao cố định của courses/event_parsing.py tại thời điểm viết migration: sửa parser của app
+# về sau không được làm đổi kết quả backfill của migration này.
+
+# Giờ thật: "9:30", "14h30", "9g30", "14h", "7 PM", "7:30 sa". Số đứng một mình không phải giờ.
+TIME_RE = re.compile(
+    r'(?<![\d/])(\d{1,2})\s*(?:[:hg]\s*(\d{2})(?!\d)|[hg](?![^\W\d_]))\s*(am|pm|sa|ch)?(?![^\W\d_])'
+    r'|(?<![\d/])(\d{1,2})\s*(am|pm|sa|ch)(?![^\W\d_])',
+    re.IGNORECASE,
+)
+# Thứ trong tuần và ngày tháng hay đứng trước giờ: "Thứ 7, 9h30", "CN 20/10 14:00"
+WEEKDAY_RE = re.compile(r'\b(?:thứ|thu|t)\s*[2-7]\b|\bcn\b|\bchủ\s*nhật\b|\bchu\s*nhat\b', re.IGNORECASE)
+DATE_RE = re.compile(r'\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b')
+RANGE_SEPARATOR_RE = re.compile(r'\s*(?:-|–|—|~|đến|den|to)\s*', re.IGNORECASE)
+
+DURATION_UNITS = [
+    (('tuần', 'tuan', 'weeks', 'week', 'w'), timedelta(weeks=1)),
+    (('ngày', 'ngay', 'days', 'day', 'd'), timedelta(days=1)),
+    (('tiếng', 'tieng', 'giờ', 'gio', 'hours', 'hour', 'hrs', 'hr', 'h'), timedelta(hours=1)),
+    (('phút', 'phut', 'minutes', 'minute', 'mins', 'min', 'p', 'm'), timedelta(minutes=1)),
+]
+# Số kèm chữ đứng ngay sau (nếu có); chữ không phải đơn vị đã biết ("3 tuần" thì có, "3 tháng" thì không) -> None
+DURATION_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*([^\W\d_]*)')
+DURATION_RANGE_RE = re.compile(r'\d\s*(?:-|–|—|~)\s*\d')
+
+FREE_WORDS = ('miễn phí', 'mien phi', 'free')
+THOUSANDS_RE = re.compile(r'^\d{1,3}([.,]\d{3})+$')
+
+
+def _clock(match):
+    if match.group(1) is not None:
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    else:
+        hour, minute, meridiem = int(match.group(4)), 0, match.group(5)
+    meridiem = (meridiem or '').lower()
+    if meridiem and hour > 12:
+        return None
+    if meridiem in ('pm', 'ch') and hour < 12:
+        hour += 12
+    elif meridiem in ('am', 'sa') and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def parse_time_range(text):
+    """
+    'Thứ 7, 9h30' -> (09:30, None), '19:00 - 21:00' -> (19:00, 21:00).
+    Không có giờ, có số lạ ngoài giờ/thứ/ngày, hoặc nhiều giờ mà không phải một khoảng -> None.
+    """
+    text = DATE_RE.sub(' ', WEEKDAY_RE.sub(' ', text or ''))
+    matches = list(TIME_RE.finditer(text))
+    if not matches or len(matches) > 2:
+        return None
+    if re.search(r'\d', TIME_RE.sub(' ', text)):
+        return None  # "9 - 11h", "phòng 3, 14h": không chắc số nào là giờ
+    times = [_clock(match) for match in matches]
+    if None in times:
+        return None
+    if len(times) == 1:
+        return times[0], None
+    if not RANGE_SEPARATOR_RE.fullmatch(text[matches[0].end():matches[1].start()]):
+        return None  # "9:00 hoặc 14:00"
+    return times[0], times[1]
+
+
+def range_duration(start, end):
+    """Thời lượng của khoảng giờ start - end, qua nửa đêm thì cộng một ngày."""
+    minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+    return timedelta(minutes=minutes % (24 * 60)) or None
+
+
+def parse_duration_text(text):
+    """'2 giờ', '1h30', '90 phút', '1:30', '1.5 hours', '3 tuần' -> timedelta; đơn vị lạ hay không đọc được -> None."""
+    text = (text or '').strip()
+    clock = re.fullmatch(r'(\d{1,2}):(\d{2})(?::(\d{2}))?', text)
+    if clock:
+        hours, minutes, seconds = (int(part or 0) for part in clock.groups())
+        return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    if DURATION_RANGE_RE.search(text):
+        return None  # "2-3 giờ"
+
+    total = timedelta()
+    previous_unit = None
+    for number, unit in DURATION_RE.findall(text):
+        value = float(number.replace(',', '.'))
+        if unit:
+            step = next((step for units, step in DURATION_UNITS if unit.lower() in units), None)
+            if step is None:
+                return None
+        elif previous_unit == timedelta(hours=1):
+            # "1h30": số không có đơn vị ngay sau giờ là phút
+            step = timedelta(minutes=1)
+        else:
+            # Số trơn: nhỏ thì hiểu là giờ, lớn thì là phút ("2" -> 2 giờ, "90" -> 90 phút)
+            step = timedelta(hours=1) if value <= 24 else timedelta(minutes=1)
+        total += value * step
+        previous_unit = step
+    return total or None
+
+
+def parse_price_text(text):
+    """'Miễn phí' -> 0, '500.000đ' / '500,000 VNĐ' -> 500000, '200k' -> 200000; trống hay không đọc được -> None."""
+    text = (str(text) if text is not None else '').strip().lower()
+    if not text:
+        return None  # chưa nhập giá, khác với miễn phí
+    if any(word in text for word in FREE_WORDS):
+        return Decimal(0)
+
+    match = re.search(r'\d[\d.,]*', text)
+    if not match:
+        return None
+    number = match.group().rstrip('.,')
+    if THOUSANDS_RE.match(number):
+        number = re.sub(r'[.,]', '', number)
+    else:
+        number = number.replace(',', '.')
+    try:
+        price = Decimal(number)
+    except InvalidOperation:
+        return None
+
+    suffix = text[match.end():].lstrip()
+    if suffix.startswith('k'):
+        price *= 1000
+    elif suffix.startswith(('tr', 'triệu', 'm')):
+        price *= 1000000
+    return price
+
+
+def backfill_typed_fields(apps, schema_editor):
+    Event = apps.get_model("courses", "Event")
+    events = list(Event.objects.only("id", "date", "time", "duration", "price"))
+    for event in events:
+        start, end = parse_time_range(event.time) or (time(0, 0), None)
+        event.starts_at = timezone.make_aware(datetime.combine(event.date, start))
+        event.duration_value = parse_duration_text(event.duration)
+        if event.duration_value is None and end is not None:
+            # "19:00 - 21:00" không có thời lượng riêng: giữ giờ kết thúc dưới dạng thời lượng
+            event.duration_value = range_duration(start, end)
+        event.price_value = parse_price_text(event.price)
+    Event.objects.bulk_update(events, ["starts_at", "duration_value", "price_value"], batch_size=500)
+
+
+def restore_text_fields(apps, schema_editor):
+    Event = apps.get_model("courses", "Event")
+    events = list(Event.objects.only("id", "starts_at", "duration_value", "price_value"))
+    for event in events:
+        local = timezone.localtime(event.starts_at)
+        event.date = local.date()
+        event.time = local.strftime("%H:%M")
+        event.duration = str(event.duration_value or "")
+        event.price = str(event.price_value if event.price_value is not None else "")
+    Event.objects.bulk_update(events, ["date", "time", "duration", "price"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_course_archived_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="starts_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="duration_value",
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="price_value",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        # Cho phép migrate ngược: cột chuỗi cũ được để trống cho tới khi restore_text_fields ghi lại
+        migrations.AlterField(
+            model_name="event",
+            name="date",
+            field=models.DateField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="time",
+            field=models.CharField(default="", max_length=50),
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="duration",
+            field=models.CharField(default="", max_length=50),
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="price",
+            field=models.CharField(default="", max_length=50),
+        ),
+        migrations.RunPython(backfill_typed_fields, restore_text_fields),
+        migrations.RemoveField(
+            model_name="event",
+            name="date",
+        ),
+        migrations.RemoveField(
+            model_name="event",
+            name="time",
+        ),
+        migrations.RemoveField(
+            model_name="event",
+            name="duration",
+        ),
+        migrations.RemoveField(
+            model_name="event",
+            name="price",
+        ),
+        migrations.RenameField(
+            model_name="event",
+            old_name="duration_value",
+            new_name="duration",
+        ),
+        migrations.RenameField(
+            model_name="event",
+            old_name="price_value",
+            new_name="price",
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="starts_at",
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["price", "starts_at"], name="courses_event_price_starts"),
+        ),
+    ]
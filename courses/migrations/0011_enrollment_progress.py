@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_event_typed_schedule_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='progress',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
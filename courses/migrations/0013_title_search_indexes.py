@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:53
+
+import courses.models
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(courses.models.PatternOps(django.db.models.functions.text.Upper('title')), name='courses_course_title_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(courses.models.PatternOps(django.db.models.functions.text.Upper('title')), name='courses_event_title_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(courses.models.PatternOps(django.db.models.functions.text.Upper('title')), name='courses_lesson_title_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(courses.models.PatternOps(django.db.models.functions.text.Upper('title')), name='courses_section_title_upper'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_registrations(apps, schema_editor):
+    # Một câu UPDATE với subquery đếm EventRegister cho từng sự kiện
+    Event = apps.get_model('courses', 'Event')
+    EventRegister = apps.get_model('courses', 'EventRegister')
+    counts = EventRegister.objects.filter(event_id=OuterRef('pk')).values('event_id').annotate(total=Count('id'))
+    Event.objects.update(registered_count=Coalesce(Subquery(counts.values('total')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_title_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registered_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_registrations, migrations.RunPython.noop),
+    ]
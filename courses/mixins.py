@@ -0,0 +1,172 @@
+from django.core.exceptions import FieldDoesNotExist
+
+from mysite.db_routers import use_replica, is_pinned, replica_configured
+
+from .edge_cache import apply_policy
+from .serializers import DynamicFieldsMixin, split_expand
+
+
+class ReplicaReadMixin:
+    # Tên action (ViewSet) hoặc method (APIView, ví dụ 'get') được phép đọc từ replica
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Chỉ quyết định sau khi DRF đã xác thực để biết user có đang bị ghim vào primary không
+        action = getattr(self, 'action', None) or request.method.lower()
+        if action in self.replica_actions and replica_configured() and not is_pinned(request.user):
+            self._replica_token = use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class EdgeCacheMixin:
+    """
+    Thêm Cache-Control (s-maxage, stale-while-revalidate) và Surrogate-Key cho các GET công khai,
+    để CDN/reverse proxy trước gunicorn trả thay. Chỉ dùng cho action mà response giống nhau với
+    mọi user; signals.py xóa các key tương ứng khi dữ liệu đổi.
+    """
+    # Tên action -> tên chính sách trong settings.EDGE_CACHE_POLICIES
+    edge_cache_actions = {}
+
+    def surrogate_keys(self, request):
+        return []
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        policy = self.edge_cache_actions.get(getattr(self, 'action', None))
+        if policy and request.method in ('GET', 'HEAD') and response.status_code == 200:
+            apply_policy(response, policy, self.surrogate_keys(request))
+        return response
+
+
+def select_related_lookups(related, prefix=''):
+    # query.select_related dạng {'course': {}, 'user': {'profile': {}}} -> ['course', 'user__profile']
+    lookups = []
+    for name, nested in related.items():
+        lookups += select_related_lookups(nested, f'{prefix}{name}__') if nested else [prefix + name]
+    return lookups
+
+
+def expansion_lookups(serializer_class, model, expand, prefix='', single=True):
+    """(select_related, prefetch_related) cho các quan hệ trong expand mà serializer cho phép mở rộng."""
+    select, prefetch = [], []
+    for name, nested in split_expand(expand).items():
+        if name not in serializer_class.expandable_fields:
+            continue
+        child_class, _ = serializer_class.expansion(name)
+        field = model._meta.get_field(name)
+        lookup = prefix + name
+        # Chỉ join được khi cả chuỗi quan hệ đều là khóa ngoại xuôi, còn lại thì prefetch
+        joinable = single and (field.many_to_one or field.one_to_one) and field.concrete
+        (select if joinable else prefetch).append(lookup)
+        if nested and issubclass(child_class, DynamicFieldsMixin):
+            child_select, child_prefetch = expansion_lookups(
+                child_class, field.related_model, nested, f'{lookup}__', joinable,
+            )
+            select += child_select
+            prefetch += child_prefetch
+    return select, prefetch
+
+
+def revisits(serializer_class, model, path):
+    """Chuỗi quan hệ trong path có quay lại model gốc không."""
+    current_class, current_model = serializer_class, model
+    for name in path.split('.'):
+        if not issubclass(current_class, DynamicFieldsMixin) or name not in current_class.expandable_fields:
+            return False
+        current_class, _ = current_class.expansion(name)
+        current_model = current_model._meta.get_field(name).related_model
+        if current_model is model:
+            return True
+    return False
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,title chỉ trả về (và chỉ SELECT) các field đó; ?expand=course,sections.lessons thay id
+    của quan hệ bằng object đầy đủ, kèm select_related/prefetch_related đúng cho các quan hệ được yêu cầu.
+    Áp dụng cho list/retrieve với serializer dùng DynamicFieldsMixin; tên không hợp lệ bị bỏ qua.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def sparse_params(self):
+        if getattr(self, 'action', None) not in self.sparse_actions:
+            return None, None
+        if not issubclass(self.get_serializer_class(), DynamicFieldsMixin):
+            return None, None
+        params = self.request.query_params
+        fields, expand = (
+            [name.strip() for name in params.get(key, '').split(',') if name.strip()]
+            for key in ('fields', 'expand')
+        )
+        # Cùng quy tắc với DynamicFieldsMixin: bỏ tên lạ, không còn tên nào thì không thu hẹp (kể cả .only())
+        fields = self.get_serializer_class().known_fields(fields)
+        return fields or None, expand or None
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.sparse_params()
+        if fields:
+            kwargs.setdefault('fields', fields)
+        if expand:
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    # filter_queryset thay vì get_queryset: các viewset tự viết get_queryset vẫn đi qua đây (list, get_object)
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, expand = self.sparse_params()
+        if not (fields or expand):
+            return queryset
+        serializer_class = self.get_serializer_class()
+        model = queryset.model
+
+        if fields:
+            # Quan hệ không được chọn thì cũng không mở rộng
+            expand = [path for path in expand or () if path.partition('.')[0] in fields]
+            columns = self.sparse_columns(serializer_class(fields=fields, expand=expand), model)
+            if any(revisits(serializer_class, model, path) for path in expand):
+                # Ví dụ course?expand=sections.course: Django gắn lại chính object gốc (đã .only) vào
+                # từng section, đọc field bị defer sẽ query từng dòng
+                columns = None
+            if columns is not None:
+                related = queryset.query.select_related
+                queryset = queryset.only(*columns)
+                if isinstance(related, dict):
+                    # Bỏ các join cho field không còn trong response
+                    kept = [lookup for lookup in select_related_lookups(related) if lookup.split('__')[0] in columns]
+                    queryset = queryset.select_related(None)
+                    if kept:  # select_related() không tham số nghĩa là join mọi khóa ngoại
+                        queryset = queryset.select_related(*kept)
+
+        select, prefetch = expansion_lookups(serializer_class, model, expand)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    @staticmethod
+    def sparse_columns(serializer, model):
+        """Các cột cần cho những field còn lại; None nếu có field không biết đọc cột nào (không dùng .only())."""
+        columns = {model._meta.pk.name}
+        for name, field in serializer.fields.items():
+            if name in serializer.field_dependencies:
+                columns.update(serializer.field_dependencies[name])
+                continue
+            if field.source == '*':
+                return None
+            attr = field.source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None  # property hay method của model
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(attr)
+            # Quan hệ ngược/nhiều-nhiều không có cột, dữ liệu đến từ prefetch
+        return columns
@@ -1,19 +1,65 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
+# Ô tìm kiếm admin "^title" trên PostgreSQL thành UPPER("title"::text) LIKE UPPER('abc%'), index btree
+# thường trên title không dùng được cho phép so sánh đó. Cần index trên UPPER(title) với text_pattern_ops
+# (operator class chỉ có trên PostgreSQL; DB khác như SQLite khi dev/test index trên biểu thức bên trong).
+# Đăng ký làm wrapper của IndexExpression trong CoursesConfig.ready, giống OpClass của django.contrib.postgres
+class PatternOps(models.Func):
+    template = '%(expressions)s text_pattern_ops'
+
+    def __init__(self, expression):
+        super().__init__(expression)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor != 'postgresql':
+            return compiler.compile(self.get_source_expressions()[0])
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+def title_search_index(table):
+    return models.Index(PatternOps(Upper('title')), name=f'{table}_title_upper')
+
+
+# Mặc định bỏ qua các khóa học đã lưu trữ (archived), dùng Course.all_objects để lấy tất cả
+class ActiveCourseManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_at__isnull=True)
+
 # Course
 class Course(models.Model):
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     description = models.TextField()
     image = models.ImageField(upload_to='course_img/', blank=True, null=True)
     is_paid = models.BooleanField(default=False)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Xóa mềm: khóa học bị ẩn ngay, dữ liệu liên quan được xóa dần ở nền (tasks.purge_course)
+    archived_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveCourseManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Index một phần chỉ chứa khóa học đang hiển thị, phục vụ danh mục "mới nhất"
+            models.Index(
+                fields=['-created_at'], name='courses_course_active_created',
+                condition=models.Q(archived_at__isnull=True),
+            ),
+            title_search_index('courses_course'),
+        ]
     
     def __str__(self):
         return self.title
 
+    def archive(self):
+        self.archived_at = timezone.now()
+        self.save(update_fields=['archived_at'])
+
     def total_lessons(self):
         return self.lessons.count()
 
@@ -26,20 +72,33 @@ class Course(models.Model):
 # Section
 class Section(models.Model):
     course = models.ForeignKey(Course, related_name='sections', on_delete=models.CASCADE)
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     order = models.PositiveIntegerField()
 
+    class Meta:
+        indexes = [
+            # Đọc các chương của khóa học theo thứ tự = quét index
+            models.Index(fields=['course', 'order'], name='courses_section_course_order'),
+            title_search_index('courses_section'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.course.title}"
     
 # Lesson
 class Lesson(models.Model):
     section = models.ForeignKey('Section', related_name='lessons', on_delete=models.CASCADE)
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     video_url = models.URLField(blank=True, null=True)
     article_content = models.TextField(blank=True, null=True)
     order = models.PositiveIntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['section', 'order'], name='courses_lesson_section_order'),
+            title_search_index('courses_lesson'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.section.title}"
     
@@ -54,6 +113,8 @@ class Enrollment(models.Model):
     user = models.ForeignKey(User, related_name='enrollments', on_delete=models.CASCADE)
     course = models.ForeignKey(Course, related_name='enrollments', on_delete=models.CASCADE)
     enrolled_at = models.DateTimeField(auto_now_add=True)
+    # Các bài đã học dạng packed (lesson_id, completed_at), xem courses/progress.py
+    progress = models.BinaryField(default=b'', editable=False)
 
     class Meta:
         unique_together = ('user', 'course')
@@ -84,23 +145,40 @@ class Event(models.Model):
         # ... thêm nếu có nhiều loại khác
     ]
     
-    title = models.CharField(max_length=255)
-    date = models.DateField()
-    time = models.CharField(max_length=50)
+    title = models.CharField(max_length=255, db_index=True)
+    starts_at = models.DateTimeField(db_index=True)  # thay cho date + time dạng chuỗi
     location = models.CharField(max_length=255)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     image_url = models.URLField(blank=True, null=True)
     image_upload = models.ImageField(upload_to='event_images/', blank=True, null=True)
     instructor = models.CharField(max_length=100)
-    attendees = models.PositiveIntegerField(default=0)
+    attendees = models.PositiveIntegerField(default=0)  # admin nhập (dự kiến / đã tham dự)
+    # Số lượt đăng ký thực tế, worker đếm lại sau mỗi lượt đăng ký/hủy (tasks.rebuild_event_attendees)
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
     description = models.TextField()
     additional_description = models.TextField()
-    duration = models.CharField(max_length=50)
+    duration = models.DurationField(null=True, blank=True)
     target_audience = models.TextField()
     prerequisites = models.TextField()
-    price = models.CharField(max_length=50)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # 0 = miễn phí
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_events')  # admin tạo
 
+    class Meta:
+        indexes = [
+            # Sự kiện miễn phí sắp diễn ra, sắp xếp theo giá
+            models.Index(fields=['price', 'starts_at'], name='courses_event_price_starts'),
+            title_search_index('courses_event'),
+        ]
+
+    # Giữ lại date/time như trước cho API và giao diện cũ
+    @property
+    def date(self):
+        return timezone.localtime(self.starts_at).date() if self.starts_at else None
+
+    @property
+    def time(self):
+        return timezone.localtime(self.starts_at).strftime('%H:%M') if self.starts_at else None
+
     def image(self):
         return self.image_upload.url if self.image_upload else self.image_url
     
@@ -118,3 +196,68 @@ class EventRegister(models.Model):
 
     def __str__(self):
         return f"{self.user.username} đăng ký {self.event.title}"
+
+# "Học viên cũng học": top-K khóa học tương tự, tính trước bởi courses/recommendations.py
+class CourseSimilarity(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='similarities')
+    similar_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('course', 'similar_course')
+        indexes = [
+            # Lấy gợi ý của một khóa học = 1 lần quét index theo (course, score giảm dần)
+            models.Index(fields=['course', '-score'], name='courses_similarity_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.similar_course_id} ({self.score:.3f})"
+
+# Hàng đợi tác vụ nền lưu trong database (không cần broker), xem courses/task_queue.py
+class Task(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker lấy task theo (status, run_at)
+            models.Index(fields=['status', 'run_at'], name='courses_task_status_run_at'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+# Query chậm gom theo fingerprint (SQL đã chuẩn hóa) và view, ghi bởi courses/slow_queries.py
+class SlowQuery(models.Model):
+    fingerprint = models.CharField(max_length=40)
+    view = models.CharField(max_length=200)
+    sql = models.TextField()  # SQL đã chuẩn hóa, tham số thay bằng ?
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    plan = models.TextField(blank=True)  # EXPLAIN lấy mẫu gần nhất
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('fingerprint', 'view')
+
+    def __str__(self):
+        return f"{self.view}: {self.sql[:80]}"
@@ -0,0 +1,156 @@
+import struct
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Enrollment, LessonProgress
+
+# Tiến độ học dạng packed: mỗi Enrollment giữ một mảng (lesson_id, completed_at) sắp xếp theo lesson_id,
+# 8 byte cho mỗi bài đã học thay cho một dòng LessonProgress cộng index unique (user, lesson).
+# Chỉ lưu bài đã xem; watched=False nghĩa là không có trong mảng.
+
+ENTRY = struct.Struct('<II')  # lesson_id, completed_at (epoch giây, 0 = không có)
+
+# id giả cho API LessonProgress: enrollment_id * ID_SPACE + lesson_id, vẫn nằm trong số nguyên an toàn
+# của JavaScript (2^53) với tối đa 2^26 bài học và 2^27 lượt đăng ký
+ID_SPACE = 2 ** 26
+
+
+def check_lesson_id(lesson_id):
+    # Lớn hơn thì id giả của hai enrollment liền nhau trùng nhau
+    if not 0 <= lesson_id < ID_SPACE:
+        raise ValueError(f"lesson_id {lesson_id} nằm ngoài [0, {ID_SPACE}), không lưu được ở packed store")
+
+
+def packed_store_enabled():
+    return settings.LESSON_PROGRESS_STORE == 'packed'
+
+
+def unpack(data):
+    """bytes -> {lesson_id: completed_at hoặc None}"""
+    return {
+        lesson_id: datetime.fromtimestamp(stamp, dt_timezone.utc) if stamp else None
+        for lesson_id, stamp in ENTRY.iter_unpack(bytes(data or b''))
+    }
+
+
+def pack(entries):
+    for lesson_id in entries:
+        check_lesson_id(lesson_id)
+    return b''.join(
+        ENTRY.pack(lesson_id, int(completed_at.timestamp()) if completed_at else 0)
+        for lesson_id, completed_at in sorted(entries.items())
+    )
+
+
+def synthetic_id(enrollment_id, lesson_id):
+    check_lesson_id(lesson_id)
+    return enrollment_id * ID_SPACE + lesson_id
+
+
+def as_progress(enrollment, lesson_id, completed_at, watched=True):
+    # LessonProgress không lưu, chỉ để LessonProgressSerializer trả về đúng định dạng cũ
+    return LessonProgress(
+        id=synthetic_id(enrollment.pk, lesson_id),
+        user_id=enrollment.user_id,
+        lesson_id=lesson_id,
+        watched=watched,
+        completed_at=completed_at,
+    )
+
+
+def enrollments_with_progress():
+    return Enrollment.objects.only('id', 'user_id', 'course_id', 'progress').exclude(progress=b'')
+
+
+def list_progress(enrollments=None):
+    enrollments = enrollments_with_progress() if enrollments is None else enrollments
+    for enrollment in enrollments.order_by('pk').iterator(chunk_size=500):
+        for lesson_id, completed_at in unpack(enrollment.progress).items():
+            yield as_progress(enrollment, lesson_id, completed_at)
+
+
+def get_progress(pk):
+    enrollment_id, lesson_id = divmod(pk, ID_SPACE)
+    enrollment = enrollments_with_progress().filter(pk=enrollment_id).first()
+    if enrollment is None:
+        return None
+    entries = unpack(enrollment.progress)
+    if lesson_id not in entries:
+        return None
+    return as_progress(enrollment, lesson_id, entries[lesson_id])
+
+
+def set_progress(user_id, lesson_id, watched, completed_at=None):
+    """Ghi một bài vào mảng của Enrollment tương ứng, khóa dòng Enrollment để các lượt ghi không đè nhau.
+
+    Trả về None nếu user chưa đăng ký khóa học chứa bài học.
+    """
+    with transaction.atomic():
+        enrollment = (
+            Enrollment.objects.select_for_update(of=('self',))
+            .only('id', 'user_id', 'progress')
+            .filter(user_id=user_id, course__sections__lessons=lesson_id)
+            .first()
+        )
+        if enrollment is None:
+            return None
+        entries = unpack(enrollment.progress)
+        if completed_at is not None:
+            completed_at = completed_at.replace(microsecond=0)  # mảng chỉ lưu tới giây
+        if watched:
+            entries[lesson_id] = completed_at
+        else:
+            entries.pop(lesson_id, None)
+        enrollment.progress = pack(entries)
+        enrollment.save(update_fields=['progress'])
+    return as_progress(enrollment, lesson_id, completed_at, watched=watched)
+
+
+def delete_progress(progress):
+    set_progress(progress.user_id, progress.lesson_id, watched=False)
+
+
+def pack_rows(batch_size=1000):
+    """Chuyển các dòng LessonProgress (watched=True) vào Enrollment.progress, theo từng lô enrollment.
+
+    Bài đã có trong mảng được giữ nguyên (ghi qua packed store sau thời điểm bật).
+    Trả về (số enrollment thay đổi, số dòng LessonProgress được thêm vào mảng).
+    """
+    enrollments_updated = lessons_packed = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Enrollment.objects.select_for_update()
+                .only('id', 'user_id', 'course_id', 'progress')
+                .filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+            )
+            if not batch:
+                return enrollments_updated, lessons_packed
+            last_pk = batch[-1].pk
+
+            rows = LessonProgress.objects.filter(
+                watched=True,
+                user_id__in={enrollment.user_id for enrollment in batch},
+                lesson__section__course_id__in={enrollment.course_id for enrollment in batch},
+            ).values_list('user_id', 'lesson__section__course_id', 'lesson_id', 'completed_at')
+            by_enrollment = {}
+            for user_id, course_id, lesson_id, completed_at in rows:
+                by_enrollment.setdefault((user_id, course_id), {})[lesson_id] = completed_at
+
+            changed = []
+            for enrollment in batch:
+                packed_rows = by_enrollment.get((enrollment.user_id, enrollment.course_id))
+                if not packed_rows:
+                    continue
+                entries = unpack(enrollment.progress)
+                added = packed_rows.keys() - entries.keys()
+                if not added:
+                    continue
+                enrollment.progress = pack({**packed_rows, **entries})
+                changed.append(enrollment)
+                lessons_packed += len(added)
+            Enrollment.objects.bulk_update(changed, ['progress'])
+            enrollments_updated += len(changed)
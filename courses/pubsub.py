@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessBroker:
+    """
+    Pub/sub trong một process: mỗi subscriber có một asyncio.Queue trên event loop của nó,
+    publish (gọi từ view sync, thread bất kỳ) đẩy message sang loop bằng call_soon_threadsafe.
+
+    Chỉ subscriber cùng process nhận được message; khi chạy nhiều worker gunicorn thì mỗi
+    worker chỉ thấy lượt đăng ký đi qua chính nó, dùng PostgresBroker để fan-out giữa các worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put_latest, queue, message)
+            except RuntimeError:
+                pass  # loop đã đóng, subscriber sẽ tự hủy đăng ký
+
+    @staticmethod
+    def _put_latest(queue, message):
+        # Subscriber chậm chỉ cần giá trị mới nhất, bỏ message cũ thay vì để hàng đợi phình ra
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def subscribe(self, channel, timeout=None):
+        """Đăng ký ngay khi gọi; dùng `async for message in subscription`, xong thì `await subscription.aclose()`."""
+        return Subscription(self, channel, timeout)
+
+    def _add(self, channel, subscriber):
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+
+    def _remove(self, channel, subscriber):
+        with self._lock:
+            self._subscribers[channel].discard(subscriber)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Fan-out giữa các process qua LISTEN/NOTIFY của PostgreSQL, cùng interface với InProcessBroker.
+
+    publish gửi NOTIFY (channel + message dạng JSON, tối đa ~8000 byte) trên kết nối DB của Django.
+    Mỗi process có một thread giữ kết nối riêng LISTEN trên pg_channel, nhận NOTIFY từ mọi worker
+    (kể cả chính nó) rồi chuyển cho subscriber cục bộ như InProcessBroker. Kết nối LISTEN cần đi thẳng
+    tới Postgres hoặc qua pooler ở session mode (PgBouncer transaction mode làm mất LISTEN).
+    Trong lúc kết nối lại sau lỗi, message bị lỡ; stream nhận lại số đúng ở lượt thay đổi kế tiếp.
+    """
+    pg_channel = 'courses_pubsub'
+    reconnect_delay = 5
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channel, message):
+        payload = json.dumps({'channel': channel, 'message': message}, ensure_ascii=False)
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    def subscribe(self, channel, timeout=None):
+        self._start_listener()
+        return super().subscribe(channel, timeout)
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                # Kết nối psycopg riêng, không thuộc connection của thread nào trong Django
+                wrapper = connections['default']
+                conn = wrapper.get_new_connection(wrapper.get_connection_params())
+                conn.autocommit = True
+                try:
+                    conn.cursor().execute(f'LISTEN {self.pg_channel}')
+                    while True:
+                        if select.select([conn], [], [], 60) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self._dispatch(conn.notifies.pop(0).payload)
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception("Mất kết nối LISTEN %s, thử lại sau %ss", self.pg_channel, self.reconnect_delay)
+                time.sleep(self.reconnect_delay)
+
+    def _dispatch(self, payload):
+        data = json.loads(payload)
+        super().publish(data['channel'], data['message'])
+
+
+class Subscription:
+    """Message của một channel; hết timeout giây không có message thì trả về None (để gửi heartbeat)."""
+
+    def __init__(self, broker, channel, timeout=None):
+        self.broker = broker
+        self.channel = channel
+        self.timeout = timeout
+        self.queue = asyncio.Queue(maxsize=1)
+        self.subscriber = (asyncio.get_running_loop(), self.queue)
+        broker._add(channel, self.subscriber)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await asyncio.wait_for(self.queue.get(), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.broker._remove(self.channel, self.subscriber)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.PUBSUB_BACKEND)()
+    return _broker
+
+
+def attendees_channel(event_id):
+    return f'event-attendees:{event_id}'
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import CourseSimilarity, Enrollment
+
+
+def similarity_matrix(pairs):
+    """
+    Từ các cặp (user_id, course_id) dựng ma trận thưa user x course, rồi tính
+    cosine giữa các khóa học: sim(i, j) = co(i, j) / sqrt(n_i * n_j).
+    """
+    # numpy/scipy chỉ cần khi chạy job, không import lúc worker web khởi động
+    import numpy as np
+    from scipy import sparse
+
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    user_ids, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    course_ids, course_index = np.unique(pairs[:, 1], return_inverse=True)
+
+    enrollments = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (user_index, course_index)),
+        shape=(len(user_ids), len(course_ids)),
+    )
+    co_enrollments = (enrollments.T @ enrollments).tocsr()
+    inverse_norms = sparse.diags(1 / np.sqrt(co_enrollments.diagonal()))
+    similarity = (inverse_norms @ co_enrollments @ inverse_norms).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return course_ids, similarity
+
+
+def similarity_rows(pairs, row_course_ids, counts):
+    """
+    Chỉ các hàng row_course_ids của ma trận cosine trên, không dựng cả ma trận course x course.
+    pairs phải gồm mọi đăng ký của những user học ít nhất một khóa trong row_course_ids (đủ để
+    đếm co(i, j) của các hàng đó), counts là số học viên n_j của mọi khóa học có trong pairs.
+    Trả về (course_ids của cột, course_ids của hàng, ma trận len(hàng) x len(cột)).
+    """
+    import numpy as np
+    from scipy import sparse
+
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    user_ids, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    course_ids, course_index = np.unique(pairs[:, 1], return_inverse=True)
+
+    enrollments = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (user_index, course_index)),
+        shape=(len(user_ids), len(course_ids)),
+    ).tocsc()
+    rows = np.flatnonzero(np.isin(course_ids, list(row_course_ids)))
+    co_enrollments = (enrollments[:, rows].T @ enrollments).tocsr()
+    # n_j lấy từ counts vì pairs chỉ chứa một phần học viên của các khóa học ở cột
+    inverse_norms = 1 / np.sqrt(np.array([counts[course_id] for course_id in course_ids], dtype=np.float32))
+    similarity = (sparse.diags(inverse_norms[rows]) @ co_enrollments @ sparse.diags(inverse_norms)).tocsr()
+    # Bỏ phần tử "đường chéo" (hàng i ứng với cột rows[i])
+    diagonal = sparse.csr_matrix((np.ones(len(rows)), (np.arange(len(rows)), rows)), shape=similarity.shape)
+    similarity = (similarity - similarity.multiply(diagonal)).tocsr()
+    similarity.eliminate_zeros()
+    return course_ids, course_ids[rows], similarity
+
+
+def top_k(course_ids, similarity, row, k):
+    import numpy as np
+
+    start, end = similarity.indptr[row], similarity.indptr[row + 1]
+    scores = similarity.data[start:end]
+    columns = similarity.indices[start:end]
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        scores, columns = scores[best], columns[best]
+    return [(int(course_ids[column]), float(score)) for column, score in zip(columns, scores)]
+
+
+def refresh_similarities(full=False, k=None):
+    """
+    Tính lại bảng CourseSimilarity. Mặc định (tăng dần) chỉ tính các hàng bị ảnh hưởng bởi
+    những lượt đăng ký mới kể từ lần chạy trước: khóa học của các user mới và mọi khóa học có
+    học viên chung với chúng (n_i đổi làm đổi sim(j, i)), chỉ đọc đăng ký của các user liên quan.
+    full=True tính lại toàn bộ (chạy định kỳ để phản ánh cả các lượt hủy đăng ký).
+    Trả về số khóa học đã cập nhật.
+    """
+    k = k or settings.RECOMMENDATION_TOP_K
+
+    # Mốc thời gian lấy lúc bắt đầu đọc dữ liệu, để lần chạy sau không bỏ sót đăng ký xen giữa
+    started_at = timezone.now()
+
+    since = None if full else CourseSimilarity.objects.aggregate(last=Max('computed_at'))['last']
+    if since is None:
+        pairs = list(Enrollment.objects.values_list('user_id', 'course_id'))
+        if not pairs:
+            return 0
+        course_ids, similarity = similarity_matrix(pairs)
+        row_ids = course_ids
+        rewrite = CourseSimilarity.objects.all()
+    else:
+        # Ai có đăng ký mới thì mọi khóa học của người đó đều đổi hàng trong ma trận
+        new_users = Enrollment.objects.filter(enrolled_at__gt=since).values('user_id')
+        affected = Enrollment.objects.filter(user_id__in=new_users).values('course_id')
+        # Láng giềng: khóa học có học viên chung với khóa bị ảnh hưởng
+        affected_users = Enrollment.objects.filter(course_id__in=affected).values('user_id')
+        row_course_ids = set(
+            Enrollment.objects.filter(user_id__in=affected_users).values_list('course_id', flat=True).distinct()
+        )
+        if not row_course_ids:
+            return 0
+        # Đủ dữ liệu để đếm co(i, j) cho các hàng cần tính: mọi đăng ký của học viên các khóa học đó
+        row_users = Enrollment.objects.filter(course_id__in=row_course_ids).values('user_id')
+        pairs = list(Enrollment.objects.filter(user_id__in=row_users).values_list('user_id', 'course_id'))
+        counts = dict(
+            Enrollment.objects.filter(course_id__in={course_id for _, course_id in pairs})
+            .values('course_id').annotate(students=Count('id')).values_list('course_id', 'students')
+        )
+        course_ids, row_ids, similarity = similarity_rows(pairs, row_course_ids, counts)
+        rewrite = CourseSimilarity.objects.filter(course_id__in=row_course_ids)
+
+    objects = [
+        CourseSimilarity(
+            course_id=int(course_id), similar_course_id=similar_id, score=score, computed_at=started_at
+        )
+        for row, course_id in enumerate(row_ids)
+        for similar_id, score in top_k(course_ids, similarity, row, k)
+    ]
+    with transaction.atomic():
+        rewrite.delete()
+        CourseSimilarity.objects.bulk_create(objects, batch_size=1000)
+    return len(row_ids)
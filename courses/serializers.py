@@ -1,43 +1,233 @@
+from datetime import datetime, time as datetime_time, timedelta
+
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import Course, Enrollment, Lesson, LessonProgress, Section, Event, EventRegister
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .event_parsing import format_duration, parse_duration_text, parse_price_text, parse_time_range, range_duration
+from .progress import delete_progress, set_progress
+from .thumbnails import thumbnail_url
+
+def split_expand(expand):
+    """['sections.lessons', 'course'] -> {'sections': ['lessons'], 'course': []}"""
+    nested = {}
+    for path in expand or ():
+        name, _, rest = path.partition('.')
+        nested.setdefault(name, [])
+        if rest:
+            nested[name].append(rest)
+    return nested
+
+
+class DynamicFieldsMixin:
+    """
+    Cho phép chọn field (fields=[...]) và mở rộng quan hệ (expand=[...]) khi khởi tạo serializer.
+    Viewset dùng mixins.SparseFieldsMixin để lấy hai tham số này từ ?fields= / ?expand= và
+    thu hẹp query tương ứng (.only, select_related, prefetch_related).
+
+    expandable_fields: tên field -> (serializer hoặc tên serializer trong module này, tham số khởi tạo)
+    field_dependencies: field không phải cột của model -> các cột nó cần đọc
+    """
+    expandable_fields = {}
+    field_dependencies = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, nested_expand in split_expand(expand).items():
+            if name not in self.expandable_fields:
+                continue
+            serializer_class, options = self.expansion(name)
+            if issubclass(serializer_class, DynamicFieldsMixin):
+                options = {**options, 'expand': nested_expand}
+            self.fields[name] = serializer_class(read_only=True, **options)
+        # Tên không có trong serializer bị bỏ qua; không còn tên nào hợp lệ thì trả đủ field
+        wanted = set(fields or ()) & set(self.fields)
+        if wanted:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+    @classmethod
+    def known_fields(cls, fields):
+        """Các tên trong fields mà serializer có (kể cả field chỉ xuất hiện khi expand), giữ thứ tự."""
+        known = set(cls().fields) | set(cls.expandable_fields)
+        return [name for name in fields if name in known]
+
+    @classmethod
+    def expansion(cls, name):
+        serializer_class, options = cls.expandable_fields[name]
+        if isinstance(serializer_class, str):
+            serializer_class = globals()[serializer_class]
+        return serializer_class, options
+
+
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    thumbnail = serializers.SerializerMethodField()
+    expandable_fields = {'sections': ('SectionSerializer', {'many': True})}
+    field_dependencies = {'thumbnail': ['image']}
 
-class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['archived_at']  # lưu trữ mềm là trạng thái nội bộ, API chỉ trả khóa học đang hoạt động
+
+    def get_thumbnail(self, course):
+        return thumbnail_url(course.image, request=self.context.get('request'))
         
-class EnrollmentSerializer(serializers.ModelSerializer):
-    course = CourseSerializer(read_only=True)  # Trả về thông tin chi tiết khóa học
+# Bản rút gọn của Course để lồng trong danh sách, không kèm description
+class CourseBriefSerializer(serializers.ModelSerializer):
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'image', 'thumbnail', 'is_paid', 'price']
+
+    def get_thumbnail(self, course):
+        return thumbnail_url(course.image, request=self.context.get('request'))
+
+class EnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    course = CourseBriefSerializer(read_only=True)  # Thông tin khóa học, cần select_related('course')
+    expandable_fields = {'course': ('CourseSerializer', {})}
 
     class Meta:
         model = Enrollment
-        fields = '__all__'
+        exclude = ['progress']  # mảng packed nội bộ, tiến độ đọc qua /api/lessonprogresses/
         
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'section': ('SectionSerializer', {})}
+
     class Meta:
         model = Lesson
         fields = '__all__'
         
-class LessonProgressSerializer(serializers.ModelSerializer):
+class LessonProgressSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'lesson': (LessonSerializer, {})}
+
     class Meta:
         model = LessonProgress
         fields = '__all__'
+
+# Cùng định dạng với LessonProgressSerializer nhưng ghi vào Enrollment.progress (courses/progress.py)
+class PackedLessonProgressSerializer(LessonProgressSerializer):
+    expandable_fields = {}  # không có queryset để select_related, mở rộng sẽ query từng dòng
+
+    class Meta(LessonProgressSerializer.Meta):
+        validators = []  # (user, lesson) là khóa trong mảng nên không cần kiểm tra unique trên bảng
+
+    def save_progress(self, user, lesson, watched, completed_at):
+        try:
+            progress = set_progress(user.pk, lesson.pk, watched, completed_at)
+        except ValueError as exc:
+            raise serializers.ValidationError({'lesson': str(exc)})
+        if progress is None:
+            raise serializers.ValidationError({'lesson': 'Người dùng chưa đăng ký khóa học chứa bài học này.'})
+        return progress
+
+    def create(self, validated_data):
+        return self.save_progress(
+            validated_data['user'], validated_data['lesson'],
+            validated_data.get('watched', False), validated_data.get('completed_at'),
+        )
+
+    def update(self, instance, validated_data):
+        user = validated_data.get('user', instance.user)
+        lesson = validated_data.get('lesson', instance.lesson)
+        if (user.pk, lesson.pk) != (instance.user_id, instance.lesson_id):
+            delete_progress(instance)
+        return self.save_progress(
+            user, lesson,
+            validated_data.get('watched', instance.watched),
+            validated_data.get('completed_at', instance.completed_at),
+        )
         
-class SectionSerializer(serializers.ModelSerializer):
+class SectionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        'course': (CourseBriefSerializer, {}),
+        'lessons': (LessonSerializer, {'many': True}),
+    }
+
     class Meta:
         model = Section
         fields = '__all__'
 
-class EventSerializer(serializers.ModelSerializer):
+class DurationTextField(serializers.Field):
+    # Lưu DurationField, còn API vẫn nhận/trả chuỗi như "1 giờ 30 phút"
+    default_error_messages = {'invalid': 'Không đọc được thời lượng "{value}".'}
+
+    def to_representation(self, value):
+        return format_duration(value)
+
+    def to_internal_value(self, data):
+        if isinstance(data, timedelta):
+            return data
+        duration = parse_duration_text(str(data))
+        if duration is None:
+            self.fail('invalid', value=data)
+        return duration
+
+
+class PriceTextField(serializers.DecimalField):
+    # Client cũ gửi "Miễn phí", "200k", "500.000đ"
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            if not data.strip() and self.allow_null:
+                return None  # giá trống là chưa có giá, không phải miễn phí
+            price = parse_price_text(data)
+            if price is None:
+                self.fail('invalid')
+            data = price
+        return super().to_internal_value(data)
+
+
+class EventSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # date/time vẫn có trong API, ghép thành starts_at khi ghi
+    date = serializers.DateField(required=False)
+    time = serializers.CharField(required=False)
+    starts_at = serializers.DateTimeField(required=False)
+    duration = DurationTextField(required=False, allow_null=True)
+    price = PriceTextField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    field_dependencies = {'date': ['starts_at'], 'time': ['starts_at']}
+
     class Meta:
         model = Event
         fields = '__all__'
+
+    def validate(self, attrs):
+        day = attrs.pop('date', None)
+        time_text = attrs.pop('time', None)
+        if 'starts_at' not in attrs and (day or time_text):
+            if day is None and self.instance is None:
+                raise serializers.ValidationError({'date': 'Trường này là bắt buộc.'})
+            start_time = None
+            if time_text:
+                parsed = parse_time_range(time_text)
+                if parsed is None:
+                    raise serializers.ValidationError({'time': 'Không đọc được giờ bắt đầu (ví dụ "9:30", "19:00 - 21:00").'})
+                start_time, end_time = parsed
+                # "19:00 - 21:00": giờ kết thúc thành thời lượng nếu client không gửi duration
+                if end_time is not None and 'duration' not in attrs:
+                    attrs['duration'] = range_duration(start_time, end_time)
+            current = timezone.localtime(self.instance.starts_at) if self.instance else None
+            day = day or current.date()
+            start_time = start_time or (current.time() if current else datetime_time(0, 0))
+            attrs['starts_at'] = timezone.make_aware(datetime.combine(day, start_time))
+        if self.instance is None and 'starts_at' not in attrs:
+            raise serializers.ValidationError({'starts_at': 'Cần starts_at hoặc date + time.'})
+        return attrs
         
-class EventRegisterSerializer(serializers.ModelSerializer):
-    event = serializers.StringRelatedField(read_only=True)
+# Bản rút gọn của Event để lồng trong danh sách đăng ký
+class EventBriefSerializer(serializers.ModelSerializer):
+    image = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Event
+        fields = ['id', 'title', 'date', 'time', 'location', 'category', 'image']
+
+class EventRegisterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    event = EventBriefSerializer(read_only=True)  # cần select_related('event')
     event_id = serializers.IntegerField(source='event.id', read_only=True)
+    expandable_fields = {'event': ('EventSerializer', {})}
     
     class Meta:
         model = EventRegister
@@ -52,10 +242,105 @@ class SectionWithLessonsSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'course', 'lessons']
 
     def get_lessons(self, section):
-        lessons = Lesson.objects.filter(section=section)
+        # Dùng lessons đã prefetch (nếu có, đã sắp theo order) thay vì query riêng cho mỗi section
+        lessons = section.lessons.all()
         return LessonSerializer(lessons, many=True).data
     
-            
+
+# Danh sách id theo thứ tự mới, dùng cho reorder-sections / reorder-lessons
+class ReorderSerializer(serializers.Serializer):
+    order = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_order(self, order):
+        if len(order) != len(set(order)):
+            raise serializers.ValidationError("Danh sách id bị trùng.")
+        return order
+
+# Bộ lọc cho thao tác hàng loạt trên user (UserBulkStatusView.USER_FILTERS)
+class UserFilterSerializer(serializers.Serializer):
+    username = serializers.CharField(required=False, help_text="Username bắt đầu bằng chuỗi này")
+    is_active = serializers.BooleanField(required=False)
+    joined_after = serializers.DateTimeField(required=False)
+    joined_before = serializers.DateTimeField(required=False)
+    course = serializers.IntegerField(required=False, help_text="Chỉ user đã đăng ký khóa học này")
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Bộ lọc rỗng sẽ áp dụng cho mọi user, cần ít nhất một điều kiện.")
+        return attrs
+
+
+class UserBulkStatusSerializer(serializers.Serializer):
+    is_active = serializers.BooleanField()
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000)
+    filter = UserFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Cần đúng một trong hai: ids hoặc filter.")
+        return attrs
+
+# Import/export nguyên cây khóa học (course -> sections -> lessons) trong một tài liệu JSON
+class ImageNameField(serializers.CharField):
+    # Chỉ giữ tên file trong storage, dùng lại ảnh có sẵn khi clone khóa học
+    def to_representation(self, value):
+        return value.name if value else None
+
+class LessonTreeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ['title', 'video_url', 'article_content', 'order']
+
+class SectionTreeSerializer(serializers.ModelSerializer):
+    lessons = LessonTreeSerializer(many=True, required=False)
+
+    class Meta:
+        model = Section
+        fields = ['title', 'order', 'lessons']
+
+    def validate_lessons(self, lessons):
+        orders = [lesson['order'] for lesson in lessons]
+        if len(orders) != len(set(orders)):
+            raise serializers.ValidationError("Thứ tự (order) của các bài học trong một chương bị trùng.")
+        return lessons
+
+class CourseTreeSerializer(serializers.ModelSerializer):
+    image = ImageNameField(required=False, allow_null=True, allow_blank=True)
+    sections = SectionTreeSerializer(many=True, required=False)
+
+    class Meta:
+        model = Course
+        fields = ['title', 'description', 'image', 'is_paid', 'price', 'sections']
+
+    @staticmethod
+    def prefetch(queryset):
+        return queryset.prefetch_related(
+            Prefetch('sections', queryset=Section.objects.order_by('order')),
+            Prefetch('sections__lessons', queryset=Lesson.objects.order_by('order')),
+        )
+
+    def validate_sections(self, sections):
+        orders = [section['order'] for section in sections]
+        if len(orders) != len(set(orders)):
+            raise serializers.ValidationError("Thứ tự (order) của các chương bị trùng.")
+        return sections
+
+    def create(self, validated_data):
+        sections_data = validated_data.pop('sections', [])
+        with transaction.atomic():
+            course = Course.objects.create(**validated_data)
+            # bulk_create trả về id (PostgreSQL, SQLite >= 3.35) để gắn lessons vào đúng section
+            sections = Section.objects.bulk_create([
+                Section(course=course, title=section['title'], order=section['order'])
+                for section in sections_data
+            ])
+            Lesson.objects.bulk_create([
+                Lesson(section=section, **lesson)
+                for section, section_data in zip(sections, sections_data)
+                for lesson in section_data.get('lessons', [])
+            ], batch_size=500)
+        return course
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .edge_cache import COURSES, EVENTS, course_key, event_key, purge_on_commit
+from .models import Course, Enrollment, Event, Lesson, Section
+from .tasks import schedule_similarity_refresh
+
+# Sửa/xóa qua save()/delete() (admin, API) thì xóa các trang công khai liên quan trên CDN.
+# Thao tác hàng loạt (update, bulk_update, bulk_create) không gửi signal, nơi gọi tự purge_on_commit.
+
+
+@receiver([post_save, post_delete], sender=Course)
+def purge_course(sender, instance, **kwargs):
+    purge_on_commit([COURSES, course_key(instance.pk)])
+
+
+@receiver([post_save, post_delete], sender=Section)
+def purge_section(sender, instance, **kwargs):
+    purge_on_commit([COURSES, course_key(instance.course_id)])
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def purge_lesson(sender, instance, **kwargs):
+    course_id = Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        purge_on_commit([COURSES, course_key(course_id)])
+
+
+@receiver([post_save, post_delete], sender=Event)
+def purge_event(sender, instance, **kwargs):
+    purge_on_commit([EVENTS, event_key(instance.pk)])
+
+
+@receiver(post_save, sender=Enrollment)
+def refresh_recommendations(sender, instance, created, **kwargs):
+    # Hủy đăng ký không có trong chế độ tăng dần, bản --full chạy hằng đêm (render.yaml) sẽ tính lại
+    if created:
+        schedule_similarity_refresh()
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, IntegrityError, connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# Bật bằng SLOW_QUERY_LOG=True. Mỗi request được bọc bằng connection.execute_wrapper trên mọi
+# database (kể cả replica); query vượt ngưỡng được ghi lại sau khi view trả response, để việc
+# EXPLAIN và ghi bảng SlowQuery không bị chính wrapper đo và không chen vào transaction của view.
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Bỏ giá trị cụ thể để các query cùng dạng có chung fingerprint: IN (%s, %s, ...) -> IN (...)."""
+    sql = sql.replace('%s', '?')
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def explain(alias, sql, params):
+    connection = connections[alias]
+    # EXPLAIN ANALYZE chạy lại query thật nên chỉ dùng cho SELECT và khi được cho phép
+    analyze = settings.SLOW_QUERY_EXPLAIN_ANALYZE and connection.vendor == 'postgresql'
+    prefix = connection.ops.explain_query_prefix(analyze=analyze) if analyze else connection.ops.explain_prefix
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN lỗi: {exc}"
+
+
+def record(view, alias, sql, params, duration_ms):
+    normalized = normalize_sql(sql)
+    key = fingerprint(normalized)
+    plan = ''
+    is_select = sql.lstrip()[:6].upper() == 'SELECT'
+    if is_select and params is not None and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE:
+        plan = explain(alias, sql, params)
+
+    logger.warning("Query chậm %.1f ms tại %s [%s]: %s", duration_ms, view, key[:12], normalized)
+
+    changes = {
+        'calls': F('calls') + 1,
+        'total_ms': F('total_ms') + duration_ms,
+        'max_ms': Greatest('max_ms', duration_ms),
+        'last_seen': timezone.now(),
+    }
+    if plan:
+        changes['plan'] = plan
+    if SlowQuery.objects.filter(fingerprint=key, view=view).update(**changes):
+        return
+    try:
+        SlowQuery.objects.create(
+            fingerprint=key, view=view, sql=normalized,
+            calls=1, total_ms=duration_ms, max_ms=duration_ms, plan=plan,
+        )
+    except IntegrityError:
+        # Request khác vừa tạo cùng dòng
+        SlowQuery.objects.filter(fingerprint=key, view=view).update(**changes)
+
+
+class QueryTimer:
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= self.threshold_ms:
+                # executemany: không EXPLAIN được với danh sách tham số
+                self.slow.append((context['connection'].alias, sql, None if many else params, duration_ms))
+
+
+@contextmanager
+def timed(timer):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield
+
+
+def save_slow(request, timer):
+    match = request.resolver_match
+    view = match.view_name if match and match.view_name else request.path
+    for alias, sql, params, duration_ms in timer.slow:
+        try:
+            record(f"{request.method} {view}"[:200], alias, sql, params, duration_ms)
+        except DatabaseError:
+            logger.exception("Không ghi được SlowQuery")
+
+
+class SlowQueryMiddleware:
+    # Chạy được cả sync và async: dưới ASGI, view async (views_async) không phải đổi qua lại thread ở middleware này
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer(settings.SLOW_QUERY_THRESHOLD_MS)
+        with timed(timer):
+            response = self.get_response(request)
+        if timer.slow:
+            save_slow(request, timer)
+        return response
+
+    async def __acall__(self, request):
+        # Connection của Django là thread-local, ORM async chạy trong thread sync_to_async (thread_sensitive)
+        # của request. Wrapper phải gắn vào connection của thread đó thay vì thread của event loop
+        timer = QueryTimer(settings.SLOW_QUERY_THRESHOLD_MS)
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(timed(timer))
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        if timer.slow:
+            await sync_to_async(save_slow)(request, timer)
+        return response
@@ -0,0 +1,100 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# Các hàm đã đăng ký bằng @task, key là tên task lưu trong bảng Task
+registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=3):
+    """
+    Đăng ký một hàm làm task nền; gọi ``func.delay(...)`` để đưa vào hàng đợi.
+
+    Task có thể chạy hơn một lần (retry sau lỗi, worker chết giữa chừng rồi task được lấy lại
+    sau TASK_STALE_TIMEOUT) nên phải idempotent: chạy lại cho cùng kết quả, ví dụ đếm lại rồi ghi đè
+    thay vì cộng dồn.
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        registry[task_name] = func
+        func.task_name = task_name
+        func.delay = lambda *args, **kwargs: enqueue(task_name, *args, max_attempts=max_attempts, **kwargs)
+        return func
+
+    return decorator(func) if func else decorator
+
+
+def enqueue(name, *args, run_at=None, max_attempts=3, **kwargs):
+    # Task nằm trong cùng transaction với request nên chỉ được worker thấy khi dữ liệu đã commit
+    return Task.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def claim_tasks(limit, names=None):
+    """Lấy tối đa ``limit`` task đến hạn và đánh dấu running, an toàn khi chạy nhiều worker."""
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'TASK_STALE_TIMEOUT', 600))
+
+    with transaction.atomic():
+        # Task running quá lâu coi như worker đã chết. Lần chạy đó đã tính vào attempts (lúc claim),
+        # hết lượt thì đánh dấu failed thay vì chạy lại mãi một task làm chết worker
+        Task.objects.filter(
+            status='running', locked_at__lt=stale_before, attempts__gte=F('max_attempts'),
+        ).update(
+            status='failed', locked_at=None, finished_at=now,
+            last_error="Quá TASK_STALE_TIMEOUT khi đang chạy và đã hết số lần thử",
+        )
+        due = Task.objects.filter(
+            Q(status='pending', run_at__lte=now)
+            | Q(status='running', locked_at__lt=stale_before, attempts__lt=F('max_attempts'))
+        )
+        if names:
+            due = due.filter(name__in=names)
+        # skip_locked: worker khác đang giữ task nào thì bỏ qua task đó (SQLite bỏ qua FOR UPDATE)
+        ids = list(
+            due.select_for_update(skip_locked=True).order_by('run_at').values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids).update(status='running', locked_at=now, attempts=F('attempts') + 1)
+    return list(Task.objects.filter(id__in=ids).order_by('run_at'))
+
+
+def run_task(task_obj):
+    func = registry.get(task_obj.name)
+    try:
+        if func is None:
+            raise LookupError(f"Task '{task_obj.name}' chưa được đăng ký")
+        func(*task_obj.args, **task_obj.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Task %s thất bại (lần %s/%s)", task_obj, task_obj.attempts, task_obj.max_attempts)
+        if task_obj.attempts < task_obj.max_attempts:
+            # Retry với backoff lũy thừa: base, 2*base, 4*base...
+            delay = getattr(settings, 'TASK_RETRY_DELAY', 30) * 2 ** (task_obj.attempts - 1)
+            Task.objects.filter(pk=task_obj.pk).update(
+                status='pending', locked_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        else:
+            Task.objects.filter(pk=task_obj.pk).update(
+                status='failed', locked_at=None, last_error=error, finished_at=timezone.now(),
+            )
+        return False
+
+    Task.objects.filter(pk=task_obj.pk).update(status='done', locked_at=None, finished_at=timezone.now())
+    return True
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .edge_cache import EVENTS, event_key, purge_on_commit
+from .models import Course, CourseSimilarity, Enrollment, Event, EventRegister, Lesson, LessonProgress, Section, Task
+from .recommendations import refresh_similarities
+from .task_queue import enqueue, task
+from .thumbnails import get_thumbnail
+
+
+@task
+def rebuild_event_attendees(event_id):
+    # Đếm lại số người đăng ký vào Event.registered_count, không đụng tới attendees do admin nhập
+    registered_count = EventRegister.objects.filter(event_id=event_id).count()
+    Event.objects.filter(pk=event_id).update(registered_count=registered_count)
+    purge_on_commit([EVENTS, event_key(event_id)])  # update() không gửi signal
+
+
+@task
+def refresh_course_similarities(full=False):
+    refresh_similarities(full=full)
+
+
+def schedule_similarity_refresh():
+    # Debounce: đã có một lần tính lại đang chờ thì các lượt đăng ký sau được gom vào lần đó
+    # (chế độ tăng dần lấy mọi Enrollment mới từ lần chạy trước)
+    name = refresh_course_similarities.task_name
+    if Task.objects.filter(name=name, status='pending').exists():
+        return
+    enqueue(name, run_at=timezone.now() + timedelta(seconds=settings.RECOMMENDATION_REFRESH_DELAY))
+
+
+@task(max_attempts=1)
+def make_thumbnail(name, size):
+    # Ảnh gốc hỏng/không phải ảnh thì chạy lại cũng vậy, lần request sau sẽ hẹn lại
+    get_thumbnail(name, size)
+
+
+def schedule_thumbnail(name, size):
+    # Nhiều request cùng một thumbnail chưa có chỉ tạo một task
+    if Task.objects.filter(
+        name=make_thumbnail.task_name, args=[name, size], status__in=('pending', 'running'),
+    ).exists():
+        return
+    make_thumbnail.delay(name, size)
+
+
+def delete_in_batches(queryset, batch_size):
+    # DELETE trực tiếp theo từng lô id, không qua Collector (không load object, không gửi signal).
+    # Mỗi lô là một câu lệnh autocommit nên lock và bộ nhớ đều có giới hạn.
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += model._base_manager.filter(pk__in=ids)._raw_delete(model._base_manager.db)
+
+
+@task
+def purge_course(course_id):
+    # Khóa học được khôi phục (bỏ archived) trước khi worker chạy thì không xóa nữa
+    if not Course.all_objects.filter(pk=course_id, archived_at__isnull=False).exists():
+        return
+
+    batch_size = settings.PURGE_BATCH_SIZE
+    # Xóa từ lá lên gốc để không vi phạm khóa ngoại
+    delete_in_batches(LessonProgress.objects.filter(lesson__section__course_id=course_id), batch_size)
+    delete_in_batches(Lesson.objects.filter(section__course_id=course_id), batch_size)
+    delete_in_batches(Section.objects.filter(course_id=course_id), batch_size)
+    delete_in_batches(Enrollment.objects.filter(course_id=course_id), batch_size)
+    delete_in_batches(
+        CourseSimilarity.objects.filter(Q(course_id=course_id) | Q(similar_course_id=course_id)), batch_size
+    )
+    Course.all_objects.filter(pk=course_id)._raw_delete(Course.all_objects.db)
@@ -1,3 +1,152 @@
-from django.test import TestCase
+import importlib
+from datetime import time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from . import event_parsing
+from .models import Course, Enrollment, Lesson, LessonProgress, Section
+from .progress import ID_SPACE, pack, pack_rows, synthetic_id, unpack
+from .serializers import EventSerializer
+
+# Migration backfill dùng bản sao riêng của parser, chạy cùng bộ dữ liệu cũ cho cả hai
+backfill_parsing = importlib.import_module('courses.migrations.0010_event_typed_schedule_price')
+
+# Chuỗi lấy từ dữ liệu Event.time / duration / price trước migration 0010
+TIME_CASES = [
+    ('9:00', (time(9, 0), None)),
+    ('14h30', (time(14, 30), None)),
+    ('9g30', (time(9, 30), None)),
+    ('14h', (time(14, 0), None)),
+    ('7 PM', (time(19, 0), None)),
+    ('7:30 sa', (time(7, 30), None)),
+    ('Thứ 7, 9h30', (time(9, 30), None)),
+    ('T7 8h', (time(8, 0), None)),
+    ('CN 20/10 14:00', (time(14, 0), None)),
+    ('19:00 - 21:00', (time(19, 0), time(21, 0))),
+    ('19h-21h', (time(19, 0), time(21, 0))),
+    ('22:00 đến 01:00', (time(22, 0), time(1, 0))),
+    # Mơ hồ hoặc không có giờ
+    ('9:00 hoặc 14:00', None),
+    ('9 - 11h', None),
+    ('Thứ 2', None),
+    ('Sáng', None),
+    ('', None),
+    ('13 pm', None),
+]
+
+DURATION_CASES = [
+    ('2 giờ', timedelta(hours=2)),
+    ('1h30', timedelta(hours=1, minutes=30)),
+    ('90 phút', timedelta(minutes=90)),
+    ('1:30', timedelta(hours=1, minutes=30)),
+    ('1.5 hours', timedelta(hours=1, minutes=30)),
+    ('1 ngày', timedelta(days=1)),
+    ('3 tuần', timedelta(weeks=3)),
+    ('2', timedelta(hours=2)),
+    ('3 tháng', None),
+    ('2-3 giờ', None),
+    ('', None),
+]
+
+PRICE_CASES = [
+    ('Miễn phí', Decimal(0)),
+    ('free', Decimal(0)),
+    ('500.000đ', Decimal(500000)),
+    ('500,000 VNĐ', Decimal(500000)),
+    ('200k', Decimal(200000)),
+    ('1.5tr', Decimal(1500000)),
+    ('', None),
+    ('   ', None),
+    (None, None),
+    ('Liên hệ', None),
+]
+
+
+class EventParsingTests(SimpleTestCase):
+    modules = [event_parsing, backfill_parsing]
+
+    def test_time_range(self):
+        for module in self.modules:
+            for text, expected in TIME_CASES:
+                with self.subTest(module=module.__name__, text=text):
+                    self.assertEqual(module.parse_time_range(text), expected)
+
+    def test_duration(self):
+        for module in self.modules:
+            for text, expected in DURATION_CASES:
+                with self.subTest(module=module.__name__, text=text):
+                    self.assertEqual(module.parse_duration_text(text), expected)
+
+    def test_price(self):
+        for module in self.modules:
+            for text, expected in PRICE_CASES:
+                with self.subTest(module=module.__name__, text=text):
+                    self.assertEqual(module.parse_price_text(text), expected)
+
+    def test_range_duration_crosses_midnight(self):
+        self.assertEqual(event_parsing.range_duration(time(22, 0), time(1, 0)), timedelta(hours=3))
+
+
+class EventSerializerTimeTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', is_staff=True)
+
+    def serialize(self, **data):
+        payload = {
+            'title': 'Workshop', 'location': 'Hà Nội', 'category': 'workshop', 'instructor': 'A',
+            'description': 'd', 'additional_description': 'd', 'target_audience': 't', 'prerequisites': 'p',
+            'created_by': self.admin.pk, 'date': '2030-06-01', **data,
+        }
+        serializer = EventSerializer(data=payload)
+        serializer.is_valid()
+        return serializer
+
+    def test_weekday_prefix(self):
+        serializer = self.serialize(time='Thứ 7, 9h30')
+        self.assertEqual(serializer.errors, {})
+        self.assertEqual(timezone.localtime(serializer.validated_data['starts_at']).time(), time(9, 30))
+
+    def test_range_sets_duration(self):
+        serializer = self.serialize(time='19:00 - 21:00')
+        self.assertEqual(serializer.errors, {})
+        self.assertEqual(serializer.validated_data['duration'], timedelta(hours=2))
+
+    def test_ambiguous_time_rejected(self):
+        self.assertIn('time', self.serialize(time='9:00 hoặc 14:00').errors)
+
+    def test_blank_price_is_null(self):
+        serializer = self.serialize(time='9:00', price='')
+        self.assertEqual(serializer.errors, {})
+        self.assertIsNone(serializer.validated_data['price'])
+
+
+class PackedProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='learner')
+        course = Course.objects.create(title='Python', description='d')
+        section = Section.objects.create(course=course, title='S1', order=1)
+        self.lessons = [Lesson.objects.create(section=section, title=f'L{i}', order=i) for i in range(3)]
+        self.enrollment = Enrollment.objects.create(user=self.user, course=course)
+
+    def test_lesson_id_outside_id_space(self):
+        with self.assertRaises(ValueError):
+            pack({ID_SPACE: None})
+        with self.assertRaises(ValueError):
+            synthetic_id(1, ID_SPACE)
+        self.assertEqual(synthetic_id(1, ID_SPACE - 1), 2 * ID_SPACE - 1)
+
+    def test_pack_rows_counts_only_added_rows(self):
+        completed_at = timezone.now().replace(microsecond=0)
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(progress=pack({self.lessons[0].pk: None}))
+        for lesson in self.lessons[:2]:
+            LessonProgress.objects.create(user=self.user, lesson=lesson, watched=True, completed_at=completed_at)
+        LessonProgress.objects.create(user=self.user, lesson=self.lessons[2], watched=False)
+
+        self.assertEqual(pack_rows(), (1, 1))
+        self.enrollment.refresh_from_db()
+        # Bài đã có trong mảng giữ nguyên giá trị cũ
+        self.assertEqual(unpack(self.enrollment.progress), {self.lessons[0].pk: None, self.lessons[1].pk: completed_at})
+        self.assertEqual(pack_rows(), (0, 0))
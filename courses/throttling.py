@@ -0,0 +1,67 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket trên cache của Django: rate '20/min' nghĩa là bucket chứa tối đa 20 lượt
+    (cho phép dồn một lúc) và được nạp lại đều 20 lượt mỗi phút. Khác SimpleRateThrottle
+    (lưu cả danh sách thời điểm request), mỗi key chỉ giữ (số lượt còn lại, thời điểm cập nhật).
+
+    DRF kiểm tra throttle trong initial(), trước khi view chạy, nên request bị chặn trả 429
+    mà không tốn lượt băm mật khẩu nào. get/set không nguyên tử: vài request đồng thời có thể
+    cùng lấy một lượt, chấp nhận được với mục đích chặn flood. Cache locmem riêng từng worker,
+    chạy nhiều worker thì đặt CACHE_URL (redis/file) để các worker dùng chung bucket.
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        refill_per_second = self.num_requests / self.duration
+        tokens, updated_at = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - updated_at) * refill_per_second)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+            self.wait_seconds = None
+        else:
+            self.wait_seconds = (1 - tokens) / refill_per_second
+        # Sau duration giây không có request thì bucket đã đầy lại, không cần giữ key
+        self.cache.set(self.key, (tokens, now), self.duration)
+        return allowed
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    # IP do proxy tin cậy ghi nhận (REMOTE_ADDR hoặc phần tử thứ NUM_PROXIES từ cuối X-Forwarded-For),
+    # nên đổi X-Forwarded-For giả mỗi lượt không tạo được bucket mới. Xem REST_FRAMEWORK['NUM_PROXIES']
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    # Chặn dò mật khẩu một tài khoản từ nhiều IP; username có hay không tồn tại đều tính như nhau
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username.strip():
+            return None  # serializer sẽ báo lỗi thiếu username, không cần băm mật khẩu
+        ident = hashlib.sha1(username.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class TokenRefreshThrottle(LoginIPThrottle):
+    scope = 'token_refresh'
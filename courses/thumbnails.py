@@ -0,0 +1,75 @@
+import os
+import posixpath
+import tempfile
+
+import cloudinary
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image
+
+THUMBNAIL_FORMAT = 'JPEG'
+THUMBNAIL_QUALITY = 80
+
+
+def is_safe_name(name):
+    # Chỉ chấp nhận đường dẫn tương đối trong storage, không cho "../"
+    normalized = posixpath.normpath(name)
+    return bool(name) and not normalized.startswith(('/', '..')) and normalized == name
+
+
+def thumbnail_path(name, size):
+    root, _ = posixpath.splitext(name)
+    return os.path.join(settings.THUMBNAIL_CACHE_DIR, size, *f"{root}.jpg".split('/'))
+
+
+def cached_thumbnail(name, size):
+    # Đường dẫn thumbnail đã tạo, None nếu chưa có (worker đang tạo, xem tasks.make_thumbnail)
+    path = thumbnail_path(name, size)
+    return path if os.path.exists(path) else None
+
+
+def get_thumbnail(name, size):
+    """Trả về đường dẫn file thumbnail trên đĩa, tạo từ ảnh gốc nếu chưa có. Chạy ở worker nền."""
+    path = thumbnail_path(name, size)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.thumbnail(settings.THUMBNAIL_SIZES[size])
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # Ghi ra file tạm rồi rename để request song song không đọc phải file ghi dở
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            image.save(tmp, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY, optimize=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def cloudinary_thumbnails():
+    # Media trên Cloudinary: Cloudinary resize theo URL, server không tải ảnh gốc về
+    return settings.MEDIA_STORAGE == 'cloudinary'
+
+
+def cloudinary_thumbnail_url(name, size):
+    from cloudinary_storage import app_settings  # noqa: F401  cloudinary.config() từ CLOUDINARY_STORAGE
+
+    width, height = settings.THUMBNAIL_SIZES[size]
+    # c_limit thu nhỏ giữ tỉ lệ, không phóng to, giống Image.thumbnail
+    return cloudinary.CloudinaryImage(name).build_url(
+        width=width, height=height, crop='limit', format='jpg', quality=THUMBNAIL_QUALITY, secure=True,
+    )
+
+
+def thumbnail_url(image, size='small', request=None):
+    if not image:
+        return None
+    if size not in settings.THUMBNAIL_SIZES:
+        raise ValueError(f"Kích thước thumbnail không hợp lệ: {size}")
+    if cloudinary_thumbnails():
+        return cloudinary_thumbnail_url(image.name, size)
+    url = reverse('thumbnail', kwargs={'size': size, 'name': image.name})
+    return request.build_absolute_uri(url) if request else url
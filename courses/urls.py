@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import CourseViewSet, EnrollmentViewSet, LessonProgressViewSet, SectionViewSet, LessonViewSet, EventViewSet,\
-    EventRegisterViewSet, CustomTokenObtainPairView, DashboardStatsView, UserAPIView
-from rest_framework_simplejwt.views import TokenRefreshView
+    EventRegisterViewSet, CustomTokenObtainPairView, UserAPIView, RecommendationView, CohortAnalyticsView,\
+    UserBulkStatusView, ThrottledTokenRefreshView, thumbnail
 from .views_auth import CurrentUserView
+from . import views_async
 
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet)
@@ -15,11 +16,20 @@ router.register(r'events', EventViewSet)
 router.register(r'event-registers', EventRegisterViewSet)
 
 urlpatterns = [
+    # Async views, đặt trước router để các đường dẫn đọc nhiều đi qua async ORM
+    path('courses/<int:pk>/sections-with-lessons/', views_async.sections_with_lessons, name='course-sections-with-lessons'),
+    path('enrollments/is-enrolled/<int:course_id>/', views_async.is_enrolled, name='enrollment-is-enrolled'),
+    path('event-registers/is-registered/<int:event_id>/', views_async.is_registered, name='eventregister-is-registered'),
+    path('events/<int:event_id>/attendees/stream/', views_async.event_attendees_stream, name='event-attendees-stream'),
     path('', include(router.urls)),
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', ThrottledTokenRefreshView.as_view(), name='token_refresh'),
     path('auth/user/', CurrentUserView.as_view(), name='current-user'),
-    path("dashboard-stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
+    path("dashboard-stats/", views_async.DashboardStatsView.as_view(), name="dashboard-stats"),
+    path('analytics/cohorts/', CohortAnalyticsView.as_view(), name='analytics-cohorts'),
     path('users/', UserAPIView.as_view(), name='user_list'),
     path('users/<int:user_id>/', UserAPIView.as_view(), name='user_detail'),
+    path('users/bulk-status/', UserBulkStatusView.as_view(), name='user_bulk_status'),
+    path('recommendations/', RecommendationView.as_view(), name='recommendations'),
+    path('thumbnails/<str:size>/<path:name>', thumbnail, name='thumbnail'),
 ]
\ No newline at end of file
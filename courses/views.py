@@ -1,59 +1,129 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.views import APIView
-from django.utils.timezone import now, timedelta
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .serializers import CustomTokenObtainPairSerializer
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.response import Response
 from django.db.models import Sum, Count
 from django.contrib.auth.models import User, Group
-
-from .models import Course, Enrollment, Lesson, LessonProgress, Section, Event, EventRegister
-from .serializers import CourseSerializer, EnrollmentSerializer, LessonSerializer, LessonProgressSerializer, SectionSerializer, EventSerializer, EventRegisterSerializer, SectionWithLessonsSerializer, UserSerializer
-
-
-class CourseViewSet(viewsets.ModelViewSet):
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponsePermanentRedirect, HttpResponseRedirect
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .analytics import cached_cohorts, cached_funnel
+from .cache import cached_data
+from .edge_cache import COURSES, EVENTS, course_key, event_key, purge_on_commit
+from .mixins import EdgeCacheMixin, ReplicaReadMixin, SparseFieldsMixin
+from .progress import delete_progress, get_progress, list_progress, packed_store_enabled
+from .pubsub import attendees_channel, get_broker
+from .models import Course, CourseSimilarity, Enrollment, Lesson, LessonProgress, Section, Event, EventRegister
+from .tasks import purge_course, rebuild_event_attendees, schedule_thumbnail
+from .thumbnails import cached_thumbnail, cloudinary_thumbnail_url, cloudinary_thumbnails, is_safe_name, thumbnail_url
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, TokenRefreshThrottle
+from .serializers import CourseBriefSerializer, CourseSerializer, CourseTreeSerializer, EnrollmentSerializer, ReorderSerializer, LessonSerializer, LessonProgressSerializer, PackedLessonProgressSerializer, SectionSerializer, EventSerializer, EventRegisterSerializer, UserBulkStatusSerializer, UserSerializer
+
+
+class CourseViewSet(ReplicaReadMixin, EdgeCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    replica_actions = ('student_counts', 'top_revenue_courses', 'funnel')
+    # Số học viên ở latest-with-students không purge theo từng lượt đăng ký, để hết hạn theo s-maxage
+    edge_cache_actions = {'list': 'catalog', 'retrieve': 'detail', 'student_counts': 'leaderboard'}
+
+    def surrogate_keys(self, request):
+        if self.action == 'retrieve':
+            return [course_key(self.kwargs['pk'])]
+        return [COURSES]
     
     @action(detail=True, methods=['get'], url_path="sections")
     def get_sections(self, request, pk=None):
-        sections = Section.objects.filter(course_id=pk)
+        sections = Section.objects.filter(course_id=pk).order_by('order')
         serializer = SectionSerializer(sections, many=True)
         return Response(serializer.data)
+
+    # Kéo thả sắp xếp lại các chương: 1 request, 1 câu UPDATE
+    @action(detail=True, methods=['post'], url_path='reorder-sections')
+    def reorder_sections(self, request, pk=None):
+        response = apply_reorder(request, Section.objects.filter(course_id=pk))
+        if response.status_code == 200:
+            purge_on_commit([COURSES, course_key(pk)])  # bulk_update không gửi signal
+        return response
        
-    @action(detail=True, methods=["get"], url_path="sections-with-lessons")
-    def sections_with_lessons(self, request, pk=None):
-        sections = Section.objects.filter(course_id=pk)
-        serializer = SectionWithLessonsSerializer(sections, many=True)
-        return Response(serializer.data)
-    
+    def perform_destroy(self, instance):
+        # Ẩn khóa học ngay, việc xóa hàng nghìn dòng liên quan để worker nền làm
+        instance.archive()
+        purge_course.delay(instance.pk)
+
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'import_tree', 'export_tree',
+                           'reorder_sections']:
             return [IsAdminUser()]
         return [IsAuthenticatedOrReadOnly()]
-    
-    @action(detail=False, methods=['get'], url_path='latest-with-students', permission_classes=[permissions.AllowAny])
-    def student_counts(self, request):
-        top = request.query_params.get('top')
-        courses = Course.objects.annotate(student_count=Count('enrollments')).order_by('-created_at')
-
-        if top and top.isdigit():
-            courses = courses[:int(top)]
 
+    # Xuất nguyên cây khóa học (sections + lessons) thành một tài liệu JSON
+    @action(detail=True, methods=['get'], url_path='export')
+    def export_tree(self, request, pk=None):
+        course = get_object_or_404(CourseTreeSerializer.prefetch(Course.objects.all()), pk=pk)
+        return Response(CourseTreeSerializer(course).data)
+
+    # Tạo khóa học từ tài liệu JSON (cùng định dạng export) trong một transaction
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_tree(self, request):
+        serializer = CourseTreeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course = serializer.save()
+        return Response(self.get_serializer(course).data, status=status.HTTP_201_CREATED)
+
+    # Phễu học theo section cho admin, tính lại mỗi ngày (courses/analytics.py)
+    @action(detail=True, methods=['get'], url_path='funnel', permission_classes=[IsAdminUser])
+    def funnel(self, request, pk=None):
+        course = self.get_object()
+        return Response(cached_funnel(course.pk))
+
+    # "Học viên cũng học": đọc từ bảng tính sẵn, không tính toán trong request
+    @action(detail=True, methods=['get'], url_path='recommendations', permission_classes=[permissions.AllowAny])
+    def recommendations(self, request, pk=None):
+        limit = recommendation_limit(request)
+        similarities = CourseSimilarity.objects.filter(course_id=pk, similar_course__archived_at__isnull=True) \
+            .select_related('similar_course').order_by('-score')[:limit]
         data = [
-            {
-                "course_id": course.id,
-                "title": course.title,
-                "image": course.image.url if course.image else None,
-                "created_at": course.created_at,
-                "price": course.price,
-                "student_count": course.student_count
-            } for course in courses
+            {**CourseBriefSerializer(item.similar_course, context={'request': request}).data, "score": item.score}
+            for item in similarities
         ]
         return Response(data)
     
+    @action(detail=False, methods=['get'], url_path='latest-with-students', permission_classes=[permissions.AllowAny])
+    def student_counts(self, request):
+        top = request.query_params.get('top')
+        top = int(top) if top and top.isdigit() else None
+
+        def build():
+            courses = Course.objects.annotate(student_count=Count('enrollments')).order_by('-created_at')
+
+            if top is not None:
+                courses = courses[:top]
+
+            return [
+                {
+                    "course_id": course.id,
+                    "title": course.title,
+                    "image": course.image.url if course.image else None,
+                    "thumbnail": thumbnail_url(course.image, request=request),
+                    "created_at": course.created_at,
+                    "price": course.price,
+                    "student_count": course.student_count
+                } for course in courses
+            ]
+
+        # Trang chủ gọi rất nhiều, cache theo 'top' (và host vì thumbnail là URL tuyệt đối)
+        key = f"latest-with-students:{top}:{request.get_host()}"
+        return Response(cached_data(key, build, settings.LEADERBOARD_CACHE_TTL, settings.LEADERBOARD_CACHE_STALE))
+    
     @action(detail=False, methods=['get'], url_path='top-revenue', permission_classes=[permissions.AllowAny])
     def top_revenue_courses(self, request):
         top = request.query_params.get('top')  # Nếu không truyền tham số top, nó sẽ là None
@@ -63,39 +133,53 @@ class CourseViewSet(viewsets.ModelViewSet):
                 top = int(top)
             except ValueError:
                 return Response({"detail": "Tham số 'top' phải là một số nguyên hợp lệ."}, status=400)
-            courses = Course.objects.annotate(
-                total_revenue=Sum('enrollments__course__price'),
-                total_enrollments=Count('enrollments')
-            ).order_by('-total_revenue')[:top]  # Giới hạn số lượng theo 'top' nếu có
         else:
+            top = None
+
+        def build():
             courses = Course.objects.annotate(
                 total_revenue=Sum('enrollments__course__price'),
                 total_enrollments=Count('enrollments')
-            ).order_by('-total_revenue')  # Lấy tất cả khóa học nếu không có tham số 'top'
-
-        data = [
-            {
-                "course_id": course.id,
-                "title": course.title,
-                "image": course.image.url if course.image else None,
-                "created_at": course.created_at,
-                "total_revenue": course.total_revenue if course.total_revenue else 0,
-                "total_enrollments": course.total_enrollments
-            }
-            for course in courses
-        ]
-        return Response(data)
-
-class EnrollmentViewSet(viewsets.ModelViewSet):
+            ).order_by('-total_revenue')
+
+            if top is not None:
+                courses = courses[:top]  # Giới hạn số lượng theo 'top' nếu có
+
+            return [
+                {
+                    "course_id": course.id,
+                    "title": course.title,
+                    "image": course.image.url if course.image else None,
+                    "thumbnail": thumbnail_url(course.image, request=request),
+                    "created_at": course.created_at,
+                    "total_revenue": course.total_revenue if course.total_revenue else 0,
+                    "total_enrollments": course.total_enrollments
+                }
+                for course in courses
+            ]
+
+        key = f"top-revenue:{top}:{request.get_host()}"
+        return Response(cached_data(key, build, settings.LEADERBOARD_CACHE_TTL, settings.LEADERBOARD_CACHE_STALE))
+
+def recommendation_limit(request):
+    limit = request.query_params.get('limit')
+    return min(int(limit), settings.RECOMMENDATION_TOP_K) if limit and limit.isdigit() else settings.RECOMMENDATION_TOP_K
+
+class EnrollmentViewSet(ReplicaReadMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.AllowAny]  # Cho phép truy cập công khai
+    # "Khóa học của tôi" đọc từ replica, trừ khi user vừa mua khóa học (xem ReplicaStickinessMiddleware)
+    replica_actions = ('list', 'paid_enrollments')
 
     def get_queryset(self):
         user = self.request.user
+        # Join luôn course để serializer không query lại từng khóa học
+        enrollments = Enrollment.objects.select_related('course').defer('progress') \
+            .filter(course__archived_at__isnull=True)
         if user.is_authenticated:
-            return Enrollment.objects.filter(user=user)
-        return Enrollment.objects.all()
+            return enrollments.filter(user=user)
+        return enrollments
 
     def create(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -107,18 +191,14 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         if Enrollment.objects.filter(user=user, course_id=course_id).exists():
             return Response({"detail": "Bạn đã đăng ký khóa học này rồi."}, status=400)
 
+        # Khóa học đã lưu trữ (đang chờ xóa) không nhận đăng ký mới
+        if not Course.objects.filter(pk=course_id).exists():
+            return Response({"detail": "Khóa học không tồn tại."}, status=400)
+
         register = Enrollment.objects.create(user=user, course_id=course_id)
         serializer = self.get_serializer(register)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    @action(detail=False, methods=['get'], url_path='is-enrolled/(?P<course_id>[^/.]+)')
-    def is_enrolled(self, request, course_id=None):
-        user = request.user
-        if not user.is_authenticated:
-            return Response({"enrolled": False})
-        enrolled = Enrollment.objects.filter(user=user, course_id=course_id).exists()
-        return Response({"enrolled": enrolled})
-
     @action(detail=False, methods=['get'], url_path='paid', permission_classes=[permissions.AllowAny])
     def paid_enrollments(self, request):
         # Lấy group "user"
@@ -128,7 +208,7 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Group 'user' không tồn tại."}, status=400)
 
         # Lấy enrollment thỏa điều kiện
-        enrollments = Enrollment.objects.select_related('course', 'user') \
+        enrollments = Enrollment.objects.select_related('course', 'user').defer('progress') \
             .filter(
                 course__price__gt=0,
                 user__groups=user_group
@@ -151,43 +231,133 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         return Response(data)
 
     
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
     
-class LessonProgressViewSet(viewsets.ModelViewSet):
+class LessonProgressViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = LessonProgress.objects.all()
     serializer_class = LessonProgressSerializer
+
+    # Với LESSON_PROGRESS_STORE = 'packed', cùng API nhưng đọc/ghi Enrollment.progress thay cho bảng
+    def get_serializer_class(self):
+        if packed_store_enabled():
+            return PackedLessonProgressSerializer
+        return LessonProgressSerializer
+
+    def get_object(self):
+        if not packed_store_enabled():
+            return super().get_object()
+        try:
+            pk = int(self.kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        progress = get_progress(pk)
+        if progress is None:
+            raise Http404
+        self.check_object_permissions(self.request, progress)
+        return progress
+
+    def list(self, request, *args, **kwargs):
+        if not packed_store_enabled():
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer(list(list_progress()), many=True)
+        return Response(serializer.data)
+
+    def perform_destroy(self, instance):
+        if packed_store_enabled():
+            delete_progress(instance)
+        else:
+            instance.delete()
     
-class SectionViewSet(viewsets.ModelViewSet):
+def apply_reorder(request, queryset):
+    # Body: {"order": [id, ...]} gồm đúng toàn bộ id con, theo thứ tự mới
+    serializer = ReorderSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['order']
+
+    with transaction.atomic():
+        items = {item.pk: item for item in queryset.select_for_update()}
+        if set(items) != set(ids):
+            return Response({"detail": "Danh sách id phải gồm đúng toàn bộ mục cần sắp xếp."}, status=400)
+
+        # Giữ nguyên tập giá trị order đang có, chỉ đổi vị trí -> không ảnh hưởng dữ liệu khác
+        positions = sorted(item.order for item in items.values())
+        changed = []
+        for item_id, position in zip(ids, positions):
+            item = items[item_id]
+            if item.order != position:
+                item.order = position
+                changed.append(item)
+        queryset.model.objects.bulk_update(changed, ['order'], batch_size=500)
+
+    return Response({"order": ids, "updated": len(changed)})
+
+class SectionViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     
     @action(detail=True, methods=["get"], url_path="lessons")
     def get_lessons(self, request, pk=None):
-        lessons = Lesson.objects.filter(section_id=pk)
+        lessons = Lesson.objects.filter(section_id=pk).order_by('order')
         serializer = LessonSerializer(lessons, many=True)
         return Response(serializer.data)
 
-class EventViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'], url_path='reorder-lessons', permission_classes=[IsAdminUser])
+    def reorder_lessons(self, request, pk=None):
+        response = apply_reorder(request, Lesson.objects.filter(section_id=pk))
+        if response.status_code == 200:
+            course_id = Section.objects.filter(pk=pk).values_list('course_id', flat=True).first()
+            purge_on_commit([COURSES, course_key(course_id)])  # bulk_update không gửi signal
+        return response
+
+class EventViewSet(EdgeCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    ordering_fields = ('starts_at', '-starts_at', 'price', '-price')
+    edge_cache_actions = {'list': 'catalog', 'retrieve': 'detail'}
+
+    def surrogate_keys(self, request):
+        if self.action == 'retrieve':
+            return [event_key(self.kwargs['pk'])]
+        return [EVENTS]
+
+    def get_queryset(self):
+        # ?upcoming=true, ?free=true, ?ordering=price: lọc/sắp xếp trong DB trên cột có index
+        events = Event.objects.all()
+        params = self.request.query_params
+        if params.get('upcoming') in ('1', 'true'):
+            events = events.filter(starts_at__gte=timezone.now())
+        if params.get('free') in ('1', 'true'):
+            events = events.filter(price=0)
+        elif params.get('free') in ('0', 'false'):
+            events = events.filter(price__gt=0)
+        ordering = params.get('ordering')
+        if ordering in self.ordering_fields:
+            return events.order_by(ordering, 'pk')
+        return events.order_by('starts_at', 'pk')
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsAdminUser()]  # chỉ admin tạo/sửa/xóa
         return [IsAuthenticatedOrReadOnly()]  # người dùng thường chỉ xem
 
-class EventRegisterViewSet(viewsets.ModelViewSet):
+def publish_attendees(event_id):
+    # Một COUNT cho mỗi lượt đăng ký/hủy, mọi người đang xem stream SSE (views_async) dùng chung kết quả
+    attendees = EventRegister.objects.filter(event_id=event_id).count()
+    get_broker().publish(attendees_channel(event_id), {"event": event_id, "attendees": attendees})
+
+class EventRegisterViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = EventRegister.objects.all()
     serializer_class = EventRegisterSerializer
     permission_classes = [permissions.AllowAny]  # Cho phép truy cập công khai
 
     def get_queryset(self):
         user = self.request.user
+        registers = EventRegister.objects.select_related('event')
         if user.is_authenticated:
-            return EventRegister.objects.filter(user=user)
-        return EventRegister.objects.all()
+            return registers.filter(user=user)
+        return registers
 
     def create(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -208,6 +378,9 @@ class EventRegisterViewSet(viewsets.ModelViewSet):
 
         # Tạo bản ghi đăng ký sự kiện mới
         register = EventRegister.objects.create(user=user, event=event)
+        # Cập nhật Event.registered_count ở worker nền thay vì trong request
+        rebuild_event_attendees.delay(event.id)
+        transaction.on_commit(lambda: publish_attendees(event.id))
         serializer = self.get_serializer(register)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -227,112 +400,53 @@ class EventRegisterViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Bạn chưa đăng ký sự kiện này."}, status=404)
 
         register.delete()
-        return Response({"detail": "Đã hủy đăng ký sự kiện."}, status=204)
+        rebuild_event_attendees.delay(register.event_id)
+        transaction.on_commit(lambda: publish_attendees(register.event_id))
+        # 204 không được có body: uvicorn/h11 sẽ cắt kết nối keep-alive nếu gửi kèm nội dung
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=['get'], url_path='is-registered/(?P<event_id>[^/.]+)')
-    def is_registered(self, request, event_id=None):
-        user = request.user
-        if not user.is_authenticated:
-            return Response({"registered": False})
-        registered = EventRegister.objects.filter(user=user, event_id=event_id).exists()
-        return Response({"registered": registered})
+# Gợi ý cho user: cộng điểm tương tự của các khóa học đã đăng ký, bỏ các khóa đã có
+class RecommendationView(APIView):
+    permission_classes = [IsAuthenticated]
 
-class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainPairSerializer
-    
-# Tổng quan 4 ô 
-class DashboardStatsView(APIView):
     def get(self, request):
-        today = now().date()
-
-        # Tuần này
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=7)
+        limit = recommendation_limit(request)
+        enrolled = Enrollment.objects.filter(user=request.user).values('course_id')
+        # Lọc khóa đã lưu trữ trước khi cắt top, nếu không có thể trả về ít hơn limit
+        scores = CourseSimilarity.objects.filter(course_id__in=enrolled, similar_course__archived_at__isnull=True) \
+            .exclude(similar_course_id__in=enrolled) \
+            .values('similar_course_id').annotate(total_score=Sum('score')) \
+            .order_by('-total_score')[:limit]
+        scores = {row['similar_course_id']: row['total_score'] for row in scores}
+        courses = Course.objects.in_bulk(scores.keys())
 
-        # Tuần trước
-        start_of_last_week = start_of_week - timedelta(days=7)
-        end_of_last_week = start_of_week
-        
-        # Lấy ngày đầu tháng này
-        start_of_this_month = today.replace(day=1)
-
-        # Lấy ngày cuối tháng trước = ngày đầu tháng này - 1
-        end_of_last_month = start_of_this_month - timedelta(days=1)
-
-        # Ngày đầu tháng trước
-        start_of_last_month = end_of_last_month.replace(day=1)
-
-        # Doanh thu: lấy trong tháng hiện tại
-        start_of_month = today.replace(day=1)
-
-        # -------- THỐNG KÊ -------- #
-        total_courses = Course.objects.count()
-        new_courses_this_week = Course.objects.filter(created_at__range=(start_of_week, end_of_week)).count()
-        new_courses_last_week = Course.objects.filter(created_at__range=(start_of_last_week, end_of_last_week)).count()
-
-        total_users = User.objects.count()
-        new_users_this_week = User.objects.filter(date_joined__range=(start_of_week, end_of_week)).count()
-        new_users_last_week = User.objects.filter(date_joined__range=(start_of_last_week, end_of_last_week)).count()
-
-        total_enrollments = Enrollment.objects.count()
-        new_enrollments_this_week = Enrollment.objects.filter(enrolled_at__range=(start_of_week, end_of_week)).count()
-        new_enrollments_last_week = Enrollment.objects.filter(enrolled_at__range=(start_of_last_week, end_of_last_week)).count()
-
-        # Doanh thu tháng này
-        enrollments_this_month = Enrollment.objects.filter(enrolled_at__gte=start_of_month)
-        revenue = enrollments_this_month.aggregate(total=Sum('course__price'))['total'] or 0
-        # Truy vấn doanh thu tháng trước
-        enrollments_last_month = Enrollment.objects.filter(enrolled_at__range=(start_of_last_month, end_of_last_month))
-        revenue_last_month = enrollments_last_month.aggregate(total=Sum('course__price'))['total'] or 0
-
-        # -------- TÍNH % THAY ĐỔI -------- #
-        def percent_change(current, previous):
-            if previous == 0:
-                return "+∞%" if current > 0 else "0%"
-            change = ((current - previous) / previous) * 100
-            return f"{change:+.0f}%"
-
-        data = {
-            "total_courses": {
-                "title": "Tổng khóa học",
-                "icon": "BookOpen",
-                "value": total_courses,
-                "change": (
-                    f"-{new_courses_this_week - new_courses_last_week} so với tuần trước"
-                    if new_courses_this_week - new_courses_last_week < 0
-                    else f"+{new_courses_this_week - new_courses_last_week} so với tuần trước"
-                    )
-            },
-            "total_users": {
-                "title": "Tổng người dùng",
-                "icon": "Users",
-                "value": total_users,
-                "change": (
-                    f"-{new_users_this_week - new_users_last_week} so với tuần trước"
-                    if new_users_this_week - new_users_last_week < 0
-                    else f"+{new_users_this_week - new_users_last_week} so với tuần trước"
-                )
-            },
-            "monthly_revenue": {
-                "title": "Doanh thu tháng",
-                "icon": "DollarSign",
-                "value": f"{revenue:,.0f}đ",
-                "change": f"+{percent_change(revenue, revenue_last_month)} so với tháng trước"
-            },
-            "new_enrollments": {
-                "title": "Đăng kí mới",
-                "icon": "PlusCircle",
-                "value": total_enrollments,
-                "change": (
-                    f"-{new_enrollments_this_week - new_enrollments_last_week} so với tuần trước"
-                    if new_enrollments_this_week - new_enrollments_last_week < 0
-                    else f"+{new_enrollments_this_week - new_enrollments_last_week} so với tuần trước"
-                )
-            }
-        }
+        data = [
+            {**CourseBriefSerializer(courses[course_id], context={'request': request}).data, "score": score}
+            for course_id, score in scores.items() if course_id in courses
+        ]
         return Response(data)
 
-class UserAPIView(APIView):
+# Cohort theo tuần đăng ký tài khoản: tỉ lệ đã đăng ký khóa học sau k tuần (?weeks=, tối đa 52)
+class CohortAnalyticsView(ReplicaReadMixin, APIView):
+    permission_classes = [IsAdminUser]
+    replica_actions = ('get',)
+
+    def get(self, request):
+        weeks = request.query_params.get('weeks')
+        weeks = min(max(int(weeks), 1), 52) if weeks and weeks.isdigit() else 12
+        return Response(cached_cohorts(weeks))
+
+class CustomTokenObtainPairView(TokenObtainPairView):
+    serializer_class = CustomTokenObtainPairSerializer
+    # Kiểm tra trước khi băm mật khẩu (PBKDF2, cố ý chậm): flood đăng nhập chỉ nhận 429
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
+
+class ThrottledTokenRefreshView(TokenRefreshView):
+    throttle_classes = [TokenRefreshThrottle]
+    
+class UserAPIView(ReplicaReadMixin, APIView):
+    replica_actions = ('get',)
+
     def get(self, request, user_id=None):
         # Lọc user trong group 'user'
         group = Group.objects.get(name='user')
@@ -371,4 +485,63 @@ class UserAPIView(APIView):
             except User.DoesNotExist:
                 return Response({'error': 'User not found or does not belong to the "user" group'}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response({'error': 'User ID is required'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({'error': 'User ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+# Khóa/mở khóa nhiều user trong một câu UPDATE, thay cho PATCH từng user
+class UserBulkStatusView(APIView):
+    permission_classes = [IsAdminUser]
+    USER_FILTERS = {
+        'username': 'username__startswith',
+        'is_active': 'is_active',
+        'joined_after': 'date_joined__gte',
+        'joined_before': 'date_joined__lt',
+        'course': 'enrollments__course_id',
+    }
+
+    def post(self, request):
+        serializer = UserBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        is_active = data['is_active']
+
+        # Chỉ tài khoản học viên (group 'user'), không bao giờ đụng tới admin đang thao tác
+        users = User.objects.filter(groups__name='user').exclude(pk=request.user.pk)
+        if 'ids' in data:
+            users = users.filter(pk__in=data['ids'])
+        else:
+            users = users.filter(**{self.USER_FILTERS[name]: value for name, value in data['filter'].items()})
+
+        # Một câu UPDATE ... WHERE id IN (subquery join group/enrollment); bỏ các user đã đúng
+        # trạng thái để số trả về là số user thực sự thay đổi
+        updated = users.exclude(is_active=is_active).update(is_active=is_active)
+        result = {'is_active': is_active, 'updated': updated}
+        if 'ids' in data:
+            result['requested'] = len(set(data['ids']))
+        return Response(result)
+
+# Ảnh thu nhỏ cho danh sách khóa học. Request không resize ảnh: chưa có thumbnail thì hẹn worker tạo
+# và tạm trả ảnh gốc. Với Cloudinary, thumbnail_url trỏ thẳng tới URL biến đổi của Cloudinary
+def thumbnail(request, size, name):
+    if size not in settings.THUMBNAIL_SIZES or not is_safe_name(name):
+        raise Http404
+    if cloudinary_thumbnails():
+        # Link cũ (trước khi dùng URL của Cloudinary) vẫn trỏ về đây
+        return HttpResponsePermanentRedirect(cloudinary_thumbnail_url(name, size))
+
+    path = cached_thumbnail(name, size)
+    if path:
+        response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+        # Tên file do storage sinh ra không bao giờ bị ghi đè nên cache được lâu dài
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    try:
+        source_url = default_storage.url(name) if default_storage.exists(name) else None
+    except (OSError, SuspiciousFileOperation):
+        source_url = None
+    if source_url is None:
+        raise Http404
+    schedule_thumbnail(name, size)
+    response = HttpResponseRedirect(source_url)
+    response['Cache-Control'] = 'no-cache'  # lần sau hỏi lại để lấy thumbnail khi worker tạo xong
+    return response
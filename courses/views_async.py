@@ -0,0 +1,218 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Prefetch, Q, Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.timezone import now, timedelta
+from django.views import View
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from mysite.db_routers import read_from_replica
+
+from .models import Course, Enrollment, Event, EventRegister, Lesson, Section
+from .pubsub import attendees_channel, get_broker
+from .serializers import SectionWithLessonsSerializer
+
+# Các endpoint đọc nhiều, chạy bằng async ORM khi deploy qua ASGI (mysite/asgi.py)
+
+jwt_authentication = JWTAuthentication()
+
+
+def json_response(data, status=200):
+    # Giữ nguyên định dạng unicode giống JSONRenderer của DRF
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+async def aget_user(request):
+    # Tương đương JWTAuthentication.authenticate nhưng truy vấn user bằng async ORM
+    header = jwt_authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = jwt_authentication.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+    user = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def auth_error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+    return json_response(detail, status=exc.status_code)
+
+
+@require_GET
+async def is_enrolled(request, course_id):
+    try:
+        user = await aget_user(request)
+    except (InvalidToken, AuthenticationFailed) as exc:
+        return auth_error_response(exc)
+
+    if user is None:
+        return json_response({"enrolled": False})
+    # User vừa mua khóa học sẽ được đọc từ primary (read-your-writes)
+    with read_from_replica(user):
+        enrolled = await Enrollment.objects.filter(user=user, course_id=course_id).aexists()
+    return json_response({"enrolled": enrolled})
+
+
+@require_GET
+async def is_registered(request, event_id):
+    try:
+        user = await aget_user(request)
+    except (InvalidToken, AuthenticationFailed) as exc:
+        return auth_error_response(exc)
+
+    if user is None:
+        return json_response({"registered": False})
+    registered = await EventRegister.objects.filter(user=user, event_id=event_id).aexists()
+    return json_response({"registered": registered})
+
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@require_GET
+async def event_attendees_stream(request, event_id):
+    """
+    Server-Sent Events: gửi số người đăng ký sự kiện ngay khi có người đăng ký/hủy
+    (EventRegisterViewSet publish qua courses/pubsub.py), thay cho việc trang sự kiện poll liên tục.
+    """
+    if not await Event.objects.filter(pk=event_id).aexists():
+        return json_response({"detail": "Sự kiện không tồn tại."}, status=404)
+
+    async def stream():
+        # Đăng ký nhận trước khi đếm để không lỡ thay đổi xảy ra giữa hai bước
+        messages = get_broker().subscribe(attendees_channel(event_id), timeout=settings.SSE_HEARTBEAT_SECONDS)
+        try:
+            attendees = await EventRegister.objects.filter(event_id=event_id).acount()
+            yield sse_message("attendees", {"event": event_id, "attendees": attendees})
+            async for message in messages:
+                # None: hết thời gian chờ, gửi comment để proxy không đóng kết nối
+                yield ": ping\n\n" if message is None else sse_message("attendees", message)
+        finally:
+            await messages.aclose()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx/proxy không gom buffer
+    return response
+
+
+@require_GET
+async def sections_with_lessons(request, pk):
+    # prefetch lessons để serializer không query thêm cho từng section
+    sections = [
+        section async for section in Section.objects.filter(course_id=pk).order_by('order').prefetch_related(
+            Prefetch('lessons', queryset=Lesson.objects.order_by('order'))
+        )
+    ]
+    serializer = SectionWithLessonsSerializer(sections, many=True)
+    return json_response(serializer.data)
+
+
+# Tổng quan 4 ô
+class DashboardStatsView(View):
+    http_method_names = ['get']
+
+    async def get(self, request):
+        today = now().date()
+
+        # Tuần này
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=7)
+
+        # Tuần trước
+        start_of_last_week = start_of_week - timedelta(days=7)
+        end_of_last_week = start_of_week
+
+        # Lấy ngày đầu tháng này
+        start_of_this_month = today.replace(day=1)
+
+        # Lấy ngày cuối tháng trước = ngày đầu tháng này - 1
+        end_of_last_month = start_of_this_month - timedelta(days=1)
+
+        # Ngày đầu tháng trước
+        start_of_last_month = end_of_last_month.replace(day=1)
+
+        # Doanh thu: lấy trong tháng hiện tại
+        start_of_month = today.replace(day=1)
+
+        # -------- THỐNG KÊ -------- #
+        # Mỗi bảng chỉ 1 query: gộp tổng + tuần này + tuần trước bằng Count(filter=...)
+        def weekly_counts(field):
+            return {
+                'total': Count('id'),
+                'this_week': Count('id', filter=Q(**{f'{field}__range': (start_of_week, end_of_week)})),
+                'last_week': Count('id', filter=Q(**{f'{field}__range': (start_of_last_week, end_of_last_week)})),
+            }
+
+        # Báo cáo chỉ đọc, chạy trên replica nếu có
+        with read_from_replica():
+            courses = await Course.objects.aaggregate(**weekly_counts('created_at'))
+            users = await User.objects.aaggregate(**weekly_counts('date_joined'))
+            enrollments = await Enrollment.objects.aaggregate(
+                **weekly_counts('enrolled_at'),
+                # Doanh thu tháng này và tháng trước
+                revenue=Sum('course__price', filter=Q(enrolled_at__gte=start_of_month)),
+                revenue_last_month=Sum(
+                    'course__price', filter=Q(enrolled_at__range=(start_of_last_month, end_of_last_month))
+                ),
+            )
+        revenue = enrollments['revenue'] or 0
+        revenue_last_month = enrollments['revenue_last_month'] or 0
+
+        # -------- TÍNH % THAY ĐỔI -------- #
+        def percent_change(current, previous):
+            if previous == 0:
+                return "+∞%" if current > 0 else "0%"
+            change = ((current - previous) / previous) * 100
+            return f"{change:+.0f}%"
+
+        def week_change(counts):
+            diff = counts['this_week'] - counts['last_week']
+            return f"-{diff} so với tuần trước" if diff < 0 else f"+{diff} so với tuần trước"
+
+        data = {
+            "total_courses": {
+                "title": "Tổng khóa học",
+                "icon": "BookOpen",
+                "value": courses['total'],
+                "change": week_change(courses)
+            },
+            "total_users": {
+                "title": "Tổng người dùng",
+                "icon": "Users",
+                "value": users['total'],
+                "change": week_change(users)
+            },
+            "monthly_revenue": {
+                "title": "Doanh thu tháng",
+                "icon": "DollarSign",
+                "value": f"{revenue:,.0f}đ",
+                "change": f"+{percent_change(revenue, revenue_last_month)} so với tháng trước"
+            },
+            "new_enrollments": {
+                "title": "Đăng kí mới",
+                "icon": "PlusCircle",
+                "value": enrollments['total'],
+                "change": week_change(enrollments)
+            }
+        }
+        return json_response(data)
@@ -0,0 +1,42 @@
+# Cấu hình gunicorn cho production, gunicorn tự đọc file này khi chạy ở thư mục gốc.
+# Mọi giá trị đều override được bằng biến môi trường (Render set sẵn WEB_CONCURRENCY và PORT).
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Worker uvicorn chạy app ASGI, mỗi process xử lý được nhiều request I/O cùng lúc
+# nên không cần công thức 2 * CPU + 1 của worker sync.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+workers = env_int("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1)
+threads = env_int("GUNICORN_THREADS", 1)
+
+# Load app một lần ở master rồi fork: code Django và settings được chia sẻ copy-on-write giữa các worker
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+# Restart worker sau một số request để chặn rò rỉ bộ nhớ, jitter để các worker không restart cùng lúc
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Với preload_app, load_superuser_once() đã mở kết nối DB ở master.
+    # Đóng lại trước khi fork để các worker không dùng chung một socket.
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
@@ -15,6 +15,8 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
 import sys
 sys.path.append(".")  # Đảm bảo Python thấy file load_superuser_once
 
+# get_asgi_application() gọi django.setup(), phải chạy trước khi đụng tới ORM
+application = get_asgi_application()
+
 from load_superuser_once import load_superuser_once
 load_superuser_once()
-application = get_asgi_application()
@@ -0,0 +1,82 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn, không có thì chỉ dùng gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+
+def accepted_encodings(header):
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    # Ưu tiên q cao hơn, bằng nhau thì br (nén tốt hơn gzip với JSON)
+    best = max(candidates, key=lambda name: encodings.get(name, wildcard))
+    return best if encodings.get(best, wildcard) > 0 else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Nén gzip/brotli theo Accept-Encoding cho response JSON/text lớn hơn COMPRESSION_MIN_SIZE.
+
+    Bỏ qua response streaming (SSE, file của WhiteNoise đã có bản nén sẵn) và các đường dẫn
+    trong COMPRESSION_EXCLUDE_PATHS (response chứa token, tránh kiểu tấn công BREACH).
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        # Response có thể khác nhau theo Accept-Encoding kể cả khi lần này không nén
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        if request.path.startswith(tuple(settings.COMPRESSION_EXCLUDE_PATHS)):
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # Nội dung đã đổi nên ETag mạnh không còn đúng từng byte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
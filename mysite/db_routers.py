@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+REPLICA = 'replica'
+
+# Bật trong phạm vi một view/báo cáo chỉ đọc, mặc định mọi query đi về primary
+use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Đưa query đọc sang replica khi đang ở trong read_from_replica(), còn lại dùng primary."""
+
+    def db_for_read(self, model, **hints):
+        if not use_replica.get() or not replica_configured():
+            return None
+        # Đang trong transaction ghi thì đọc luôn ở primary để thấy dữ liệu vừa ghi
+        if connections['default'].in_atomic_block:
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica là bản sao của primary nên quan hệ giữa hai bên luôn hợp lệ
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Schema của replica đến từ replication (hoặc copy file SQLite khi dev)
+        if db == REPLICA:
+            return False
+        return None
+
+
+def pin_key(user_id):
+    return f'db-pin-primary:{user_id}'
+
+
+def pin_to_primary(user):
+    """
+    Sau khi user ghi dữ liệu, các lượt đọc của user đó đi về primary thêm vài giây.
+    Ghim lưu trong cache mặc định, settings bắt buộc cache dùng chung khi có replica.
+    """
+    if replica_configured() and user is not None and user.is_authenticated:
+        cache.set(pin_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and bool(cache.get(pin_key(user.pk)))
+
+
+@contextmanager
+def read_from_replica(user=None):
+    if not replica_configured() or is_pinned(user):
+        yield
+        return
+    token = use_replica.set(True)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """Ghim user vào primary sau mỗi request ghi thành công (read-your-writes)."""
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            # DRF gán user đã xác thực bằng JWT ngược lại vào HttpRequest
+            pin_to_primary(getattr(request, 'user', None))
+        return response
@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import dj_database_url
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+import importlib.util
 import os
 
 from pathlib import Path
@@ -44,29 +46,48 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "api",
     "rest_framework",
     "courses",
     'rest_framework_simplejwt',
-    'cloudinary',
     'cloudinary_storage',
     'corsheaders',
-    'django_extensions'
 ]
 
+# App chỉ dùng khi dev (shell_plus, show_urls...), không load trong worker production
+if DEBUG and importlib.util.find_spec('django_extensions'):
+    INSTALLED_APPS.append('django_extensions')
+
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
     "django.middleware.security.SecurityMiddleware",
+    # Static file trả về ngay tại đây, không đi qua phần còn lại của stack
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Nén sau cùng (khi trả response), sau khi các middleware bên dưới đã sửa xong body
+    "mysite.compression.CompressionMiddleware",
+    # Chỉ hoạt động khi SLOW_QUERY_LOG=True, đo mọi query của các middleware/view bên dưới
+    "courses.slow_queries.SlowQueryMiddleware",
+    'corsheaders.middleware.CorsMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "mysite.db_routers.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
+# Nén response (mysite/compression.py): gzip, thêm brotli nếu cài gói Brotli
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)  # byte
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+COMPRESSION_EXCLUDE_PATHS = ['/api/token/']  # response chứa JWT
+
+# Log query chậm (courses/slow_queries.py), xem top bằng: python manage.py slow_queries
+SLOW_QUERY_LOG = config('SLOW_QUERY_LOG', default=False, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=float)
+SLOW_QUERY_EXPLAIN_SAMPLE = config('SLOW_QUERY_EXPLAIN_SAMPLE', default=0.1, cast=float)  # tỉ lệ query chậm được EXPLAIN
+# EXPLAIN ANALYZE chạy lại query (chỉ SELECT, chỉ PostgreSQL)
+SLOW_QUERY_EXPLAIN_ANALYZE = config('SLOW_QUERY_EXPLAIN_ANALYZE', default=False, cast=bool)
+
 ROOT_URLCONF = "mysite.urls"
 
 TEMPLATES = [
@@ -95,6 +116,62 @@ DATABASES = {
     'default': dj_database_url.config(default=config('DATABASE_URL'))
 }
 
+# Read replica (tùy chọn) cho báo cáo/thống kê, cần CACHE_URL dùng chung (xem dưới), ví dụ khi dev với 2 file SQLite:
+# DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 CACHE_URL=file:///tmp/coman-cache
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL)
+    # Khi chạy test, replica trỏ về chính database test của default
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['mysite.db_routers.ReplicaRouter']
+# Số giây user được đọc từ primary sau khi ghi dữ liệu
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+
+
+# Cache: locmem (mặc định, riêng từng process), file:///đường/dẫn, hoặc redis://host:6379/0
+# (gói redis có trong requirements-prod.txt). Nên dùng file/redis khi chạy nhiều worker để dùng chung cache.
+CACHE_URL = config('CACHE_URL', default='locmem://')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'coman',
+        }
+    }
+
+# Ghim read-your-writes (mysite/db_routers.py) nằm trong cache: với locmem mỗi worker gunicorn có bản riêng,
+# request tiếp theo rơi vào worker khác sẽ đọc replica và không thấy dữ liệu user vừa ghi
+if DATABASE_REPLICA_URL and CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured(
+        'DATABASE_REPLICA_URL cần CACHE_URL dùng chung giữa các worker (redis://... hoặc file://...)'
+    )
+
+# Cache các bảng xếp hạng công khai (latest-with-students, top-revenue), tính bằng giây.
+# Sau TTL vẫn trả bản cũ thêm tối đa STALE giây trong lúc làm mới ở nền.
+LEADERBOARD_CACHE_TTL = config('LEADERBOARD_CACHE_TTL', default=60, cast=int)
+LEADERBOARD_CACHE_STALE = config('LEADERBOARD_CACHE_STALE', default=300, cast=int)
+
+# Số khóa học tương tự lưu sẵn cho mỗi khóa học (python manage.py build_recommendations)
+RECOMMENDATION_TOP_K = config('RECOMMENDATION_TOP_K', default=10, cast=int)
+# Gom các lượt đăng ký mới trong khoảng này (giây) thành một lần tính lại tăng dần
+RECOMMENDATION_REFRESH_DELAY = config('RECOMMENDATION_REFRESH_DELAY', default=300, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -147,10 +224,35 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Token bucket cho /api/token/ và /api/token/refresh/ (courses/throttling.py): "số lượt/khoảng thời gian"
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='20/min'),
+        'login_username': config('LOGIN_THROTTLE_USERNAME_RATE', default='5/min'),
+        'token_refresh': config('TOKEN_REFRESH_THROTTLE_RATE', default='60/min'),
+    },
+    # Số reverse proxy tin cậy phía trước app (Render: 1, đặt trong render.yaml): IP client là địa chỉ
+    # proxy cuối cùng ghi vào X-Forwarded-For. 0 (mặc định) dùng REMOTE_ADDR, bỏ qua header client tự gửi
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
+# Media: 'cloudinary' (production) hoặc 'local' để dev/test/benchmark không cần mạng
+MEDIA_STORAGE = config('MEDIA_STORAGE', default='cloudinary')
+MEDIA_URL = '/media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+
 # Cloudiary
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+if MEDIA_STORAGE == 'local':
+    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+else:
+    DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+
+# Thumbnail (courses/thumbnails.py): với Cloudinary dùng URL biến đổi ảnh của Cloudinary; với media local,
+# worker tạo bằng Pillow ở lần xem đầu tiên (tasks.make_thumbnail) rồi cache trên đĩa
+THUMBNAIL_CACHE_DIR = config('THUMBNAIL_CACHE_DIR', default=os.path.join(BASE_DIR, 'media', 'thumbs'))
+THUMBNAIL_SIZES = {
+    'small': (320, 180),
+    'medium': (640, 360),
+}
 
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': 'db6v0hvtz',
@@ -164,6 +266,31 @@ CORS_ALLOWED_ORIGINS = [
     'https://coman.vercel.app'
 ]
 
+# Hàng đợi task nền (courses/task_queue.py), worker: python manage.py run_tasks
+TASK_RETRY_DELAY = config('TASK_RETRY_DELAY', default=30, cast=int)  # giây, nhân đôi sau mỗi lần thất bại
+TASK_STALE_TIMEOUT = config('TASK_STALE_TIMEOUT', default=600, cast=int)  # task running quá lâu sẽ được chạy lại
+# Số dòng mỗi câu DELETE khi xóa hẳn khóa học đã lưu trữ (tasks.purge_course)
+PURGE_BATCH_SIZE = config('PURGE_BATCH_SIZE', default=1000, cast=int)
+
+# Nơi lưu tiến độ bài học: 'rows' (bảng LessonProgress) hoặc 'packed' (Enrollment.progress, courses/progress.py).
+# Chuyển dữ liệu cũ sang packed: python manage.py pack_lesson_progress
+LESSON_PROGRESS_STORE = config('LESSON_PROGRESS_STORE', default='rows')
+
+# Pub/sub cho các stream SSE (courses/pubsub.py); SSE_HEARTBEAT_SECONDS giữ kết nối qua proxy khi không có thay đổi.
+# InProcessBroker chỉ đến được subscriber cùng worker; nhiều worker gunicorn thì dùng courses.pubsub.PostgresBroker
+PUBSUB_BACKEND = config('PUBSUB_BACKEND', default='courses.pubsub.InProcessBroker')
+SSE_HEARTBEAT_SECONDS = config('SSE_HEARTBEAT_SECONDS', default=15, cast=int)
+
+# Cache ở CDN/reverse proxy cho GET công khai (courses/edge_cache.py, EdgeCacheMixin), đơn vị giây.
+# Sửa dữ liệu thì signals.py gọi EDGE_CACHE_PURGER xóa theo Surrogate-Key; NoopPurger (mặc định) hoặc
+# LoggingPurger khi không có CDN, khi đó trang cũ tự hết hạn sau s_maxage.
+EDGE_CACHE_POLICIES = {
+    'catalog': {'s_maxage': config('EDGE_CACHE_CATALOG_TTL', default=60, cast=int), 'stale_while_revalidate': 300},
+    'detail': {'s_maxage': config('EDGE_CACHE_DETAIL_TTL', default=300, cast=int), 'stale_while_revalidate': 600},
+    'leaderboard': {'s_maxage': LEADERBOARD_CACHE_TTL, 'stale_while_revalidate': LEADERBOARD_CACHE_STALE},
+}
+EDGE_CACHE_PURGER = config('EDGE_CACHE_PURGER', default='courses.edge_cache.NoopPurger')
+
 # Cấu hình cho JWT
 from datetime import timedelta
 
@@ -15,8 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.views.static import serve
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -26,3 +28,9 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/', include('courses.urls')),
 ]
+
+# Storage local (dev/test): Django tự phục vụ file media
+if settings.MEDIA_STORAGE == 'local':
+    urlpatterns += [
+        re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    ]